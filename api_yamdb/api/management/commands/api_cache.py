@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from api.v1.cache import GLOBAL_GROUP, bump, get_cache_stats
+
+CACHED_VIEWS = ('titles', 'categories', 'genres', 'reviews', 'comments')
+
+
+class Command(BaseCommand):
+    help = 'Статистика попаданий в кэш ответов API!'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Сбросить все закэшированные ответы',
+        )
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            bump(GLOBAL_GROUP)
+            self.stdout.write('Кэш ответов API сброшен!')
+        for name, stats in get_cache_stats(CACHED_VIEWS).items():
+            total = stats['hit'] + stats['miss']
+            ratio = stats['hit'] / total if total else 0
+            self.stdout.write(
+                f'{name}: попаданий {stats["hit"]}, '
+                f'промахов {stats["miss"]} ({ratio:.0%})'
+            )
@@ -0,0 +1,155 @@
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from time import perf_counter
+
+from django.db import connections
+
+# Границы корзин гистограмм: время в мс и число запросов к БД.
+TIME_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+TIMINGS = ('db', 'serialize', 'render', 'total')
+
+current = ContextVar('api_metrics', default=None)
+
+
+class RequestMetrics:
+    """ Счётчики одного запроса. Время - в секундах. """
+
+    def __init__(self):
+        self.view = None
+        self.queries = 0
+        self.db = 0
+        self.render = 0
+        self.started = perf_counter()
+        self.total = 0
+
+    def execute(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db += perf_counter() - started
+
+    def finish(self):
+        self.total = perf_counter() - self.started
+
+    @property
+    def serialize(self):
+        """ Время представления вне SQL и отрисовки: разбор запроса,
+        проверка прав, сборка объектов и работа сериализатора.
+        """
+        return max(self.total - self.db - self.render, 0)
+
+    def timings_ms(self):
+        return {name: getattr(self, name) * 1000 for name in TIMINGS}
+
+
+@contextmanager
+def track_queries():
+    """ Считает запросы текущего потока в метрики запроса, если
+    они собираются. Нужен в потоках, где выполняется представление
+    (см. api/v1/asynchronous.py): обёртка execute у каждого потока
+    своя, как и соединение с БД.
+    """
+    metrics = current.get()
+    with ExitStack() as stack:
+        if metrics is not None:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(metrics.execute)
+                )
+        yield metrics
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.max = 0
+
+    def add(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def as_dict(self):
+        bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+        return {
+            'sum': round(self.sum, 3),
+            'max': round(self.max, 3),
+            'buckets': dict(zip(bounds, self.counts)),
+        }
+
+
+class ViewMetrics:
+
+    def __init__(self):
+        self.count = 0
+        self.over_budget = 0
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.timings = {name: Histogram(TIME_BUCKETS) for name in TIMINGS}
+
+    def add(self, metrics, over_budget):
+        self.count += 1
+        self.over_budget += over_budget
+        self.queries.add(metrics.queries)
+        for name, value in metrics.timings_ms().items():
+            self.timings[name].add(value)
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'over_budget': self.over_budget,
+            'queries': self.queries.as_dict(),
+            **{
+                f'{name}_ms': histogram.as_dict()
+                for name, histogram in self.timings.items()
+            },
+        }
+
+
+class MetricsRegistry:
+    """ Накопленные метрики представлений процесса. """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._views = {}
+
+    def record(self, metrics, over_budget=False):
+        with self._lock:
+            if metrics.view not in self._views:
+                self._views[metrics.view] = ViewMetrics()
+            self._views[metrics.view].add(metrics, over_budget)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: view.as_dict()
+                for name, view in sorted(self._views.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._views = {}
+
+
+registry = MetricsRegistry()
+
+
+def get_view_name(view_func, method):
+    """ Имя представления для метрик и бюджетов: для viewset -
+    'TitleViewSet.list', для остальных - имя функции.
+    """
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return f'{view_func.__module__}.{view_func.__name__}'
+    actions = getattr(view_func, 'actions', None) or {}
+    method = method.lower()
+    if method == 'head' and method not in actions:
+        method = 'get'
+    return f'{cls.__name__}.{actions.get(method, method)}'
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+from time import perf_counter
+
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+
+from .metrics import (
+    RequestMetrics, current, get_view_name, registry, track_queries
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+class MetricsMiddleware(MiddlewareMixin):
+    """ Число и время SQL-запросов, время сериализации, отрисовки
+    и всего запроса по представлениям. Отдаёт их в заголовке
+    Server-Timing и копит гистограммы для /api/v1/_metrics/.
+    Сверяет запрос с бюджетом METRICS_BUDGETS: превышение пишется
+    в лог, а при METRICS_BUDGETS_RAISE - вызывает BudgetExceeded
+    (для тестов). Ставится последним в MIDDLEWARE, чтобы время
+    остальных middleware не попадало в сериализацию.
+    Под ASGI работает асинхронно и не переводит цепочку middleware
+    в общий поток; SQL-запросы там считаются в потоках представлений
+    (api/v1/asynchronous.py).
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if asyncio.iscoroutinefunction(get_response):
+            # Иначе Django выполняет синхронные хуки в общем потоке.
+            self.process_view = self.aprocess_view
+            self.process_template_response = (
+                self.aprocess_template_response
+            )
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        token = current.set(metrics)
+        try:
+            with track_queries():
+                response = self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.finish(metrics, response)
+
+    async def __acall__(self, request):
+        if not settings.METRICS_ENABLED:
+            return await self.get_response(request)
+        metrics = RequestMetrics()
+        token = current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.finish(metrics, response)
+
+    def finish(self, metrics, response):
+        metrics.finish()
+        if metrics.view is None:
+            return response
+        if settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = self.server_timing(metrics)
+        registry.record(metrics, self.check_budget(metrics))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = current.get()
+        if metrics is not None:
+            metrics.view = get_view_name(view_func, request.method)
+
+    async def aprocess_view(self, request, view_func, view_args,
+                            view_kwargs):
+        type(self).process_view(
+            self, request, view_func, view_args, view_kwargs
+        )
+
+    async def aprocess_template_response(self, request, response):
+        return type(self).process_template_response(self, request, response)
+
+    def process_template_response(self, request, response):
+        metrics = current.get()
+        if metrics is None:
+            return response
+        render = response.render
+
+        def timed_render():
+            started = perf_counter()
+            try:
+                return render()
+            finally:
+                metrics.render += perf_counter() - started
+        response.render = timed_render
+        return response
+
+    def server_timing(self, metrics):
+        timings = metrics.timings_ms()
+        return ', '.join(
+            f'db;dur={timings["db"]:.1f};desc="{metrics.queries} queries"'
+            if name == 'db' else f'{name};dur={timings[name]:.1f}'
+            for name in timings
+        )
+
+    def check_budget(self, metrics):
+        budget = settings.METRICS_BUDGETS.get(metrics.view)
+        if not budget:
+            return False
+        problems = []
+        if metrics.queries > budget.get('queries', float('inf')):
+            problems.append(
+                f'{metrics.queries} запросов при бюджете {budget["queries"]}'
+            )
+        total = metrics.total * 1000
+        if total > budget.get('ms', float('inf')):
+            problems.append(f'{total:.0f} мс при бюджете {budget["ms"]}')
+        if not problems:
+            return False
+        message = f'{metrics.view}: {", ".join(problems)}'
+        if settings.METRICS_BUDGETS_RAISE:
+            raise BudgetExceeded(message)
+        logger.warning(message)
+        return True
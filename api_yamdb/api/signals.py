@@ -0,0 +1,86 @@
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_init, post_save
+)
+from django.dispatch import receiver
+
+from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+from reviews.signals import comment_title_id, data_changed
+from users.models import User
+
+from .v1.cache import GLOBAL_GROUP, bump_on_commit
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category(sender, instance, **kwargs):
+    bump_on_commit('categories', 'titles')
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genre(sender, instance, **kwargs):
+    bump_on_commit('genres', 'titles')
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def invalidate_title(sender, instance, **kwargs):
+    # Название произведения выводится в его отзывах.
+    bump_on_commit('titles', f'reviews:{instance.pk}')
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, **kwargs):
+    bump_on_commit('titles')
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review(sender, instance, **kwargs):
+    # Отзыв меняет рейтинг произведения, а его текст
+    # выводится в комментариях.
+    bump_on_commit(
+        'titles',
+        f'reviews:{instance.title_id}',
+        f'comments:{instance.pk}',
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment(sender, instance, **kwargs):
+    # Число комментариев выводится в отзывах.
+    bump_on_commit(
+        f'comments:{instance.review_id}',
+        f'reviews:{comment_title_id(instance)}',
+    )
+
+
+@receiver(post_init, sender=User)
+def remember_username(sender, instance, **kwargs):
+    instance._cached_username = instance.__dict__.get('username')
+
+
+@receiver(post_save, sender=User)
+def invalidate_user(sender, instance, created, **kwargs):
+    """ Имена авторов выводятся в отзывах и комментариях: кэш
+    сбрасывается только при смене имени. У нового пользователя
+    отзывов ещё нет.
+    """
+    # Отложенное и не присвоенное имя не менялось.
+    username = instance.__dict__.get('username')
+    if not created and username != instance._cached_username:
+        bump_on_commit('users')
+    instance._cached_username = username
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user(sender, instance, **kwargs):
+    bump_on_commit('users')
+
+
+@receiver(data_changed)
+def invalidate_all(sender, **kwargs):
+    bump_on_commit(GLOBAL_GROUP)
@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from time import perf_counter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework.permissions import SAFE_METHODS
+
+from api.metrics import track_queries
+
+# В Django 3.2 ORM синхронный, поэтому асинхронный путь чтения
+# выполняет обычное представление DRF в отдельном пуле потоков.
+# Пул ограничен: число одновременных запросов к БД не растёт вместе
+# с числом соединений, лишние запросы ждут в очереди событийного
+# цикла, не занимая потоков. Запись идёт прежним путём Django -
+# в общем потоке для синхронного кода.
+read_executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_READ_THREADS,
+    thread_name_prefix='api-read',
+)
+
+
+def _run_view(view, request, *args, **kwargs):
+    # Потоки пула живут дольше запроса, соединения с БД в них
+    # закрываются так же, как по сигналам request_started/finished.
+    close_old_connections()
+    try:
+        with track_queries() as metrics:
+            response = view(request, *args, **kwargs)
+            # Ответ DRF отрисовывается в том же потоке, а не в общем.
+            if hasattr(response, 'render') and not response.is_rendered:
+                started = perf_counter()
+                response.render()
+                if metrics is not None:
+                    metrics.render += perf_counter() - started
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_read_view(view):
+    """ Асинхронная обёртка представления для ASGI: GET и HEAD
+    выполняются в пуле read_executor.
+    """
+    read = sync_to_async(
+        _run_view, thread_sensitive=False, executor=read_executor
+    )
+    write = sync_to_async(_run_view, thread_sensitive=True)
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        run = read if request.method in SAFE_METHODS else write
+        return await run(view, request, *args, **kwargs)
+
+    return wrapper
+
+
+def async_read_urls(urls, basenames):
+    """ Подменяет представления маршрутов роутера с указанными
+    basename на асинхронные обёртки.
+    """
+    for pattern in urls:
+        name = pattern.name or ''
+        if name.rsplit('-', 1)[0] in basenames:
+            pattern.callback = async_read_view(pattern.callback)
+    return urls
@@ -0,0 +1,34 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import (
+    JWTAuthentication, JWTStatelessUserAuthentication
+)
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from users.cache import get_auth_state
+
+
+class RoleJWTAuthentication(JWTStatelessUserAuthentication):
+    """ Аутентификация по JWT без загрузки пользователя из БД:
+    роль и права берутся из claims токена (users.tokens). Из кэша
+    проверяется только, что пользователь активен и его токены
+    не отозваны после смены роли. Токены без claim role, выданные
+    до перехода, обслуживаются по-старому - с запросом в БД.
+    """
+
+    def get_user(self, validated_token):
+        if 'role' not in validated_token:
+            return JWTAuthentication.get_user(self, validated_token)
+        user = super().get_user(validated_token)
+        state = get_auth_state(user.id)
+        if state is None or not state['is_active']:
+            raise AuthenticationFailed(
+                _('User not found'), code='user_not_found'
+            )
+        revoked_at = state['revoked_at']
+        # iat - целые секунды: токен, выданный в ту же секунду, что
+        # и отзыв, мог быть выдан до него, поэтому тоже отклоняется.
+        if revoked_at is not None and validated_token['iat'] <= revoked_at:
+            raise AuthenticationFailed(
+                'Токен отозван, получите новый!', code='token_revoked'
+            )
+        return user
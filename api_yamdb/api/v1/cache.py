@@ -0,0 +1,152 @@
+from functools import partial
+from hashlib import md5
+from time import time_ns
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import (
+    get_conditional_response, patch_vary_headers, quote_etag
+)
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+VERSION_KEY = 'api:version:{}'
+RESPONSE_KEY = 'api:response:{}'
+STATS_KEY = 'api:stats:{}:{}'
+# Версия, входящая в ключ каждого ответа: сброс всего кэша разом.
+GLOBAL_GROUP = 'all'
+
+
+def get_versions(groups):
+    """ Текущие версии групп кэша. Версия - время последнего
+    изменения в наносекундах, отсутствующую заводим заново:
+    новое значение не совпадёт ни с одним из старых ключей.
+    """
+    keys = [VERSION_KEY.format(group) for group in groups]
+    versions = cache.get_many(keys)
+    missing = {key: time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump(*groups):
+    """ Инвалидирует все ответы, построенные из данных групп. """
+    now = time_ns()
+    cache.set_many(
+        {VERSION_KEY.format(group): now for group in groups},
+        timeout=None,
+    )
+
+
+def bump_on_commit(*groups):
+    """ bump после фиксации текущей транзакции (вне транзакции -
+    сразу): иначе запрос между bump и COMMIT закэширует старые
+    строки под новой версией.
+    """
+    transaction.on_commit(partial(bump, *groups))
+
+
+def count(name, event):
+    key = STATS_KEY.format(name, event)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def get_cache_stats(names):
+    keys = {
+        STATS_KEY.format(name, event): (name, event)
+        for name in names
+        for event in ('hit', 'miss')
+    }
+    stats = {name: {'hit': 0, 'miss': 0} for name in names}
+    for key, value in cache.get_many(keys).items():
+        name, event = keys[key]
+        stats[name][event] = value
+    return stats
+
+
+def get_role(user):
+    if not user.is_authenticated:
+        return 'anon'
+    if user.is_superuser:
+        return 'superuser'
+    return user.role
+
+
+class CachedListMixin:
+    """ Кэширует данные ответов list и отвечает на условные GET.
+    Ключ кэша и ETag строятся из адреса с параметрами запроса,
+    роли пользователя и версий групп, от которых зависит ответ
+    (см. api/signals.py), Last-Modified - самая свежая из этих
+    версий. Если клиент прислал актуальные If-None-Match или
+    If-Modified-Since, отвечаем 304 без запросов к БД.
+    """
+
+    cache_groups = ()
+
+    def get_cache_groups(self):
+        return self.cache_groups
+
+    def get_validators(self, request):
+        """ ETag (без кавычек) и время изменения ответа в секундах. """
+        versions = get_versions(
+            (GLOBAL_GROUP, *self.get_cache_groups())
+        )
+        raw_key = '|'.join((
+            request.build_absolute_uri(),
+            request.accepted_renderer.format,
+            get_role(request.user),
+            *map(str, versions),
+        ))
+        return md5(raw_key.encode()).hexdigest(), max(versions) // 10**9
+
+    def cached_response(self, action, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(
+            request, etag=quote_etag(etag), last_modified=last_modified
+        )
+        if response is not None:
+            count(self.basename, 'hit')
+        else:
+            response = self.cached_data_response(
+                RESPONSE_KEY.format(etag), action, request, *args, **kwargs
+            )
+        if response.status_code in (200, 304):
+            response['ETag'] = quote_etag(etag)
+            response['Last-Modified'] = http_date(last_modified)
+            # Ответ зависит от формата и роли пользователя.
+            patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
+
+    def cached_data_response(self, key, action, request, *args, **kwargs):
+        data = cache.get(key)
+        if data is not None:
+            count(self.basename, 'hit')
+            return Response(data)
+        count(self.basename, 'miss')
+        response = action(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+
+class CachedResponseMixin(CachedListMixin):
+    """ То же для list и retrieve. Только для представлений
+    с retrieve: иначе роутер построит маршрут объекта.
+    """
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -0,0 +1,82 @@
+from django.conf import settings
+from rest_framework.fields import DateTimeField
+
+from reviews.models import DELETE, Category, Comment, Genre, Review, Title
+from users.models import User
+
+from .fast import ValuesSerializer
+from .serializers import (
+    CategorySerializer, CommentSerializer, GenreSerializer,
+    GetTitleSerializer, ReviewSerializer, UserSerializer
+)
+
+# Текущее состояние записей журнала: модель -> (queryset, сериализатор).
+SNAPSHOTS = {
+    'category': (Category.objects.all(), CategorySerializer),
+    'genre': (Genre.objects.all(), GenreSerializer),
+    'title': (
+        Title.objects.select_related('category').prefetch_related('genre'),
+        GetTitleSerializer,
+    ),
+    'review': (
+        Review.objects.select_related('author', 'title'),
+        ReviewSerializer,
+    ),
+    'comment': (
+        Comment.objects.select_related('author', 'review'),
+        CommentSerializer,
+    ),
+    'user': (User.objects.all(), UserSerializer),
+}
+
+# Время изменения - строкой, как даты в сериализаторах: datetime
+# отправил бы рендеринг на медленный путь JSONRenderer.
+CREATED_AT = DateTimeField()
+
+
+def snapshot(model, object_ids):
+    """ {id: данные} записей модели, как в их сериализаторе. """
+    queryset, serializer_class = SNAPSHOTS[model]
+    queryset = queryset.filter(pk__in=object_ids)
+    if settings.FAST_SERIALIZATION:
+        serializer = ValuesSerializer(serializer_class())
+        rows = list(serializer.values(queryset))
+        return {
+            row['pk']: item for row, item in zip(
+                rows, serializer.to_representation(rows)
+            )
+        }
+    objs = list(queryset)
+    return {
+        obj.pk: item for obj, item in zip(
+            objs, serializer_class(objs, many=True).data
+        )
+    }
+
+
+def serialize_changes(changes):
+    """ Изменения с текущими данными записей: по одному запросу
+    на модель в пачке. У удалённых записей data - None.
+    """
+    ids = {}
+    for change in changes:
+        if change.action != DELETE:
+            ids.setdefault(change.model, set()).add(change.object_id)
+    data = {
+        model: snapshot(model, object_ids)
+        for model, object_ids in ids.items()
+    }
+    return [
+        {
+            'id': change.id,
+            'model': change.model,
+            'object_id': change.object_id,
+            'action': change.action,
+            'created_at': CREATED_AT.to_representation(change.created_at),
+            'data': (
+                None if change.action == DELETE
+                else data[change.model].get(change.object_id)
+            ),
+        }
+        for change in changes
+    ]
@@ -0,0 +1,174 @@
+from collections import defaultdict
+
+from django.conf import settings
+from rest_framework.relations import RelatedField
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.serializers import ListSerializer, Serializer
+
+from .renderers import FastJSONRenderer
+
+# Метка вложенного списка ManyToMany в ValuesSerializer.columns.
+MANY = object()
+
+
+def _plain(field):
+    """ Значение столбца -> представление поля, как в DRF:
+    None выводится как есть, без to_representation.
+    """
+    to_representation = field.to_representation
+
+    def mapper(value):
+        return None if value is None else to_representation(value)
+    return mapper
+
+
+def _nested_mappers(serializer, prefix):
+    return [
+        (name, f'{prefix}__{field.source}', _plain(field))
+        for name, field in serializer.fields.items()
+    ]
+
+
+class ValuesSerializer:
+    """ Быстрый путь сериализации списков: строки читаются через
+    values() и переводятся в словари заранее собранными функциями,
+    без объектов моделей и обхода полей DRF на каждую запись.
+    Функции берутся из полей исходного сериализатора (с учётом
+    ?fields=/?exclude=), поэтому вывод совпадает с ним до байта.
+    Поддерживаются простые поля модели, SlugRelatedField, вложенный
+    сериализатор внешнего ключа и many=True по ManyToMany.
+    """
+
+    def __init__(self, serializer):
+        self.model = serializer.Meta.model
+        # (поле ответа, столбец values() или вложенный сериализатор,
+        # функция или список функций вложенных полей) в порядке полей.
+        self.columns = []
+        self.lookups = {'pk'}
+        self.many = []
+        for name, field in serializer.fields.items():
+            if isinstance(field, ListSerializer):
+                self.many.append((name, field))
+                self.columns.append((name, field, MANY))
+                continue
+            if isinstance(field, Serializer):
+                mappers = _nested_mappers(field, field.source)
+                self.lookups.update(lookup for _, lookup, _ in mappers)
+                self.columns.append((name, field.source, mappers))
+                lookup = field.source
+            elif isinstance(field, RelatedField):
+                lookup = f'{field.source}__{field.slug_field}'
+                self.columns.append((name, lookup, None))
+            else:
+                lookup = field.source
+                self.columns.append((name, lookup, _plain(field)))
+            self.lookups.add(lookup)
+
+    def values(self, queryset):
+        """ Queryset словарей для пагинатора. Поля сортировки
+        добавляются: по ним курсорная пагинация строит курсор.
+        """
+        ordering = queryset.query.order_by or self.model._meta.ordering
+        return queryset.prefetch_related(None).values(
+            *self.lookups, *(name.lstrip('-') for name in ordering)
+        )
+
+    def to_representation(self, rows):
+        many = {
+            name: self.fetch_many(field, [row['pk'] for row in rows])
+            for name, field in self.many
+        }
+        data = []
+        for row in rows:
+            item = {}
+            for name, lookup, mapper in self.columns:
+                if mapper is MANY:
+                    item[name] = many[name].get(row['pk'], [])
+                elif isinstance(mapper, list):
+                    item[name] = None if row[lookup] is None else {
+                        key: convert(row[column])
+                        for key, column, convert in mapper
+                    }
+                elif mapper is None:
+                    item[name] = row[lookup]
+                else:
+                    item[name] = mapper(row[lookup])
+            data.append(item)
+        return data
+
+    def fetch_many(self, field, pks):
+        """ Вложенные списки ManyToMany для всей страницы одним
+        запросом к промежуточной таблице, в порядке сортировки
+        связанной модели, как при prefetch_related.
+        """
+        m2m = self.model._meta.get_field(field.source)
+        source = m2m.m2m_field_name()
+        target = m2m.m2m_reverse_field_name()
+        mappers = _nested_mappers(field.child, target)
+        ordering = [
+            _prefixed(name, target)
+            for name in m2m.related_model._meta.ordering
+        ]
+        rows = (
+            m2m.remote_field.through.objects
+            .filter(**{f'{source}__in': pks})
+            .order_by(*ordering, f'{target}__pk')
+            .values_list(source, *(column for _, column, _ in mappers))
+        )
+        result = defaultdict(list)
+        for pk, *values in rows:
+            result[pk].append({
+                key: convert(value)
+                for (key, _, convert), value in zip(mappers, values)
+            })
+        return result
+
+
+def _prefixed(name, prefix):
+    if name.startswith('-'):
+        return f'-{prefix}__{name[1:]}'
+    return f'{prefix}__{name}'
+
+
+class FastRendererMixin:
+    """ JSON действий fast_actions рендерит FastJSONRenderer, если
+    включён FAST_SERIALIZATION.
+    """
+
+    fast_actions = ('list',)
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if not (
+            settings.FAST_SERIALIZATION
+            and getattr(self, 'action', None) in self.fast_actions
+        ):
+            return renderers
+        return [
+            FastJSONRenderer() if type(renderer) is JSONRenderer
+            else renderer
+            for renderer in renderers
+        ]
+
+
+class FastListMixin(FastRendererMixin):
+    """ list через ValuesSerializer, если включён FAST_SERIALIZATION
+    и у представления задан fast_serialization = True.
+    """
+
+    fast_serialization = True
+
+    def list(self, request, *args, **kwargs):
+        if not (settings.FAST_SERIALIZATION and self.fast_serialization):
+            return super().list(request, *args, **kwargs)
+        serializer = ValuesSerializer(self.get_serializer())
+        queryset = serializer.values(
+            self.filter_queryset(self.get_queryset())
+        )
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(serializer.to_representation(list(queryset)))
+        return self.get_paginated_response(
+            serializer.to_representation(page)
+        )
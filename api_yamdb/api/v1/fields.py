@@ -0,0 +1,24 @@
+from django.utils.encoding import smart_str
+from rest_framework.serializers import SlugRelatedField
+
+
+class CachedSlugRelatedField(SlugRelatedField):
+    """ SlugRelatedField, который ищет объект в SlugCache
+    справочника, а не запросом к БД на каждое значение.
+    """
+
+    def __init__(self, slug_cache, **kwargs):
+        self.slug_cache = slug_cache
+        super().__init__(slug_field='slug', **kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, (dict, list)):
+            self.fail('invalid')
+        obj = self.slug_cache.get(smart_str(data))
+        if obj is None:
+            self.fail(
+                'does_not_exist',
+                slug_name=self.slug_field,
+                value=smart_str(data),
+            )
+        return obj
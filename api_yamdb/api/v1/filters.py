@@ -1,5 +1,7 @@
 from django_filters import rest_framework as filters
 
+from reviews.lookups import category_slugs, genre_slugs
+from reviews.search import filter_titles
 from reviews.models import Title
 
 
@@ -9,12 +11,13 @@ class TitleFilter(filters.FilterSet):
         lookup_expr='icontains',
     )
     category = filters.CharFilter(
-        field_name='category__slug',
-        lookup_expr='icontains',
+        method='filter_category',
     )
     genre = filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='icontains',
+        method='filter_genre',
+    )
+    search = filters.CharFilter(
+        method='filter_search',
     )
 
     class Meta:
@@ -23,5 +26,21 @@ class TitleFilter(filters.FilterSet):
             'category',
             'genre',
             'name',
+            'search',
             'year',
         )
+
+    def filter_category(self, queryset, name, value):
+        # Slug ищем в справочнике в памяти - без JOIN на категории.
+        return queryset.filter(
+            category__in=category_slugs.ids_containing(value)
+        )
+
+    def filter_genre(self, queryset, name, value):
+        return queryset.filter(
+            genre__in=genre_slugs.ids_containing(value)
+        )
+
+    def filter_search(self, queryset, name, value):
+        # Полнотекстовый поиск по названию и описанию.
+        return filter_titles(queryset, value)
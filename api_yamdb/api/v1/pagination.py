@@ -0,0 +1,36 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+PAGINATION_PARAM = 'pagination'
+CURSOR = 'cursor'
+
+
+class PubDateCursorPagination(CursorPagination):
+    """ Keyset-пагинация по (pub_date, id): страница выбирается
+    условием по индексу, без OFFSET и COUNT(*).
+    """
+
+    ordering = ('pub_date', 'id')
+
+
+class SwitchablePaginationMixin:
+    """ Курсорная пагинация вместо постраничной, если она включена
+    в настройках (FEED_PAGINATION) или запрошена параметром
+    ?pagination=cursor. Ссылки next/previous содержат ?cursor=.
+    """
+
+    cursor_pagination_class = PubDateCursorPagination
+
+    def use_cursor_pagination(self):
+        params = self.request.query_params
+        mode = params.get(PAGINATION_PARAM, settings.FEED_PAGINATION)
+        return mode == CURSOR or CURSOR in params
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.use_cursor_pagination():
+                self._paginator = self.cursor_pagination_class()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
@@ -16,7 +16,7 @@ class AdminModerAuthorUserOrReadOnly(IsAuthenticatedOrReadOnly):
             request.method in SAFE_METHODS
             or request.user.is_authenticated
             and (
-                obj.author == request.user
+                obj.author_id == request.user.id
                 or request.user.is_admin
                 or request.user.is_moderator
                 or request.user.is_superuser
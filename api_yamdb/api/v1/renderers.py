@@ -0,0 +1,54 @@
+import re
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson не экранирует разделители строк, а JSONRenderer экранирует.
+LINE_SEPARATORS = (
+    ('\u2028'.encode(), b'\\u2028'),
+    ('\u2029'.encode(), b'\\u2029'),
+)
+
+# Дробные числа, которые orjson пишет не так, как json: с порядком
+# (1e16 и 1e-7 вместо 1e+16 и 1e-07) и меньше 1e-4 без порядка
+# (0.000015 вместо 1.5e-05). Остальные совпадают. Совпадение внутри
+# строки ("1e5") лишь переводит ответ на стандартный рендерер.
+FLOAT_MISMATCH = re.compile(rb'[0-9][eE]|0\.0000')
+
+
+class FastJSONRenderer(JSONRenderer):
+    """ JSONRenderer на orjson (если установлен) с тем же выводом:
+    компактно, без экранирования не-ASCII. Если нужен отступ или
+    в данных есть типы, которые orjson пишет иначе (datetime,
+    Decimal, ленивые строки) или дробные числа из FLOAT_MISMATCH,
+    рендерит стандартный JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        try:
+            ret = orjson.dumps(data, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except TypeError:
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        if FLOAT_MISMATCH.search(ret):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        for raw, escaped in LINE_SEPARATORS:
+            ret = ret.replace(raw, escaped)
+        return ret
@@ -1,24 +1,33 @@
 from django.contrib.auth.tokens import default_token_generator
-from django.shortcuts import get_object_or_404
 from rest_framework import status
 
-from rest_framework.fields import IntegerField
+from rest_framework.fields import (
+    ChoiceField, DecimalField, DictField, FloatField, IntegerField
+)
 from rest_framework.response import Response
 from rest_framework.serializers import (
-    ModelSerializer, SlugRelatedField, CharField, EmailField
+    ModelSerializer, Serializer, SlugRelatedField, CharField, EmailField
 )
 from rest_framework.validators import (
     UniqueValidator, ValidationError
 )
 from rest_framework_simplejwt.tokens import AccessToken
 
+from reviews.changes import TRACKED
+from reviews.leaderboards import RANKINGS, RATING
+from reviews.lookups import category_slugs, genre_slugs
+from reviews.search import KINDS
 from reviews.models import (
     Review, Title, Category, Comment, Genre
 )
 from users.models import User
+from .fields import CachedSlugRelatedField
+from .sparse import SparseFieldsSerializerMixin
 from .validators import validator_username, validate_me
 from api_yamdb.settings import (
-    EMAIL_MAX_LENGTH, USERNAME_MAX_LENGTH, CONFIRMATION_CODE_MAX_LENGTH
+    EMAIL_MAX_LENGTH, USERNAME_MAX_LENGTH, CONFIRMATION_CODE_MAX_LENGTH,
+    TOP_TITLES_LIMIT, TOP_TITLES_MAX_LIMIT, SIMILAR_TITLES_COUNT,
+    CHANGES_LIMIT, CHANGES_MAX_LIMIT
 )
 
 
@@ -92,10 +101,12 @@ class UserSerializer(ModelSerializer):
             'last_name',
             'bio',
             'role',
+            'reviews_count',
+            'comments_count',
         )
 
 
-class ReviewSerializer(ModelSerializer):
+class ReviewSerializer(SparseFieldsSerializerMixin, ModelSerializer):
     title = SlugRelatedField(
         slug_field='name',
         read_only=True,
@@ -111,17 +122,12 @@ class ReviewSerializer(ModelSerializer):
 
     def validate(self, data):
         request = self.context['request']
-        author = request.user
-        title_id = self.context['view'].kwargs['title_id']
-        title = get_object_or_404(
-            Title,
-            id=title_id
-        )
+        title = self.context['view'].title
         if (
             request.method == 'POST'
             and Review.objects.filter(
                 title=title,
-                author=author,
+                author_id=request.user.id,
             ).exists()
         ):
             raise ValidationError(
@@ -145,12 +151,12 @@ class GenreSerializer(ModelSerializer):
 
 
 class TitleSerializer(ModelSerializer):
-    category = SlugRelatedField(
-        slug_field='slug',
+    category = CachedSlugRelatedField(
+        slug_cache=category_slugs,
         queryset=Category.objects.all(),
     )
-    genre = SlugRelatedField(
-        slug_field='slug',
+    genre = CachedSlugRelatedField(
+        slug_cache=genre_slugs,
         queryset=Genre.objects.all(),
         many=True,
     )
@@ -167,9 +173,8 @@ class TitleSerializer(ModelSerializer):
         )
 
 
-class GetTitleSerializer(ModelSerializer):
+class GetTitleSerializer(SparseFieldsSerializerMixin, ModelSerializer):
     rating = IntegerField(
-        source='reviews__score__avg',
         read_only=True,
     )
     genre = GenreSerializer(
@@ -187,10 +192,116 @@ class GetTitleSerializer(ModelSerializer):
             'name',
             'year',
             'rating',
+            'reviews_count',
         )
 
 
-class CommentSerializer(ModelSerializer):
+class TopTitleSerializer(GetTitleSerializer):
+    weighted_rating = DecimalField(
+        max_digits=4,
+        decimal_places=2,
+        coerce_to_string=False,
+        read_only=True,
+    )
+
+    class Meta(GetTitleSerializer.Meta):
+        fields = GetTitleSerializer.Meta.fields + ('weighted_rating',)
+
+
+class TrendingTitleSerializer(GetTitleSerializer):
+    trending = FloatField(
+        read_only=True,
+    )
+
+    class Meta(GetTitleSerializer.Meta):
+        fields = GetTitleSerializer.Meta.fields + ('trending',)
+
+
+class SimilarTitleSerializer(GetTitleSerializer):
+    similarity = FloatField(
+        read_only=True,
+    )
+
+    class Meta(GetTitleSerializer.Meta):
+        fields = GetTitleSerializer.Meta.fields + ('similarity',)
+
+
+class TitleStatsSerializer(SparseFieldsSerializerMixin, Serializer):
+    """ Гистограмма оценок произведения: scores - количество отзывов
+    с каждой оценкой от 1 до 10.
+    """
+    reviews_count = IntegerField()
+    mean = FloatField(
+        allow_null=True,
+    )
+    median = FloatField(
+        allow_null=True,
+    )
+    scores = DictField(
+        child=IntegerField(),
+    )
+
+
+class TopTitlesQuerySerializer(Serializer):
+    """ Параметры /titles/top/. """
+    by = ChoiceField(
+        choices=tuple(RANKINGS),
+        default=RATING,
+    )
+    category = CharField(
+        required=False,
+    )
+    genre = CharField(
+        required=False,
+    )
+    year = IntegerField(
+        required=False,
+    )
+    limit = IntegerField(
+        min_value=1,
+        max_value=TOP_TITLES_MAX_LIMIT,
+        default=TOP_TITLES_LIMIT,
+    )
+
+
+class TrendingQuerySerializer(Serializer):
+    """ Параметры /titles/trending/. """
+    limit = IntegerField(
+        min_value=1,
+        max_value=TOP_TITLES_MAX_LIMIT,
+        default=TOP_TITLES_LIMIT,
+    )
+
+
+class SimilarQuerySerializer(Serializer):
+    """ Параметры /titles/{id}/similar/. """
+    limit = IntegerField(
+        min_value=1,
+        max_value=SIMILAR_TITLES_COUNT,
+        default=SIMILAR_TITLES_COUNT,
+    )
+
+
+class ChangesQuerySerializer(Serializer):
+    """ Параметры /changes/: since - курсор (next прошлого ответа),
+    model - только изменения одной модели.
+    """
+    since = IntegerField(
+        min_value=0,
+        default=0,
+    )
+    limit = IntegerField(
+        min_value=1,
+        max_value=CHANGES_MAX_LIMIT,
+        default=CHANGES_LIMIT,
+    )
+    model = ChoiceField(
+        choices=TRACKED,
+        required=False,
+    )
+
+
+class CommentSerializer(SparseFieldsSerializerMixin, ModelSerializer):
     review = SlugRelatedField(
         slug_field='text',
         read_only=True,
@@ -203,3 +314,13 @@ class CommentSerializer(ModelSerializer):
     class Meta:
         model = Comment
         fields = '__all__'
+
+
+class SearchResultSerializer(Serializer):
+    type = ChoiceField(
+        choices=KINDS,
+    )
+    id = IntegerField()
+    title_id = IntegerField()
+    snippet = CharField()
+    rank = FloatField()
@@ -0,0 +1,97 @@
+from django.utils.functional import cached_property
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXCLUDE_PARAM = 'exclude'
+
+
+class SparseFieldsSerializerMixin:
+    """ Сериализатор, выводящий только поля из fields. """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class SparseFieldsMixin:
+    """ Параметры ?fields=id,name и ?exclude=description сужают
+    ответы представления (сериализаторы всех его действий принимают
+    fields - SparseFieldsSerializerMixin): лишние поля не выводятся
+    сериализатором и не читаются из БД (defer, без лишних JOIN
+    и prefetch).
+    """
+
+    @cached_property
+    def sparse_fields(self):
+        """ Поля ответа или None, если сужать не нужно. """
+        params = self.request.query_params
+        if self.request.method not in SAFE_METHODS or not (
+            FIELDS_PARAM in params or EXCLUDE_PARAM in params
+        ):
+            return None
+        available = list(self.get_serializer_class()().fields)
+        requested = {}
+        for param in (FIELDS_PARAM, EXCLUDE_PARAM):
+            names = [
+                name.strip()
+                for name in params.get(param, '').split(',')
+                if name.strip()
+            ]
+            unknown = [name for name in names if name not in available]
+            if unknown:
+                raise ValidationError(
+                    {param: [f'Нет полей: {", ".join(unknown)}']}
+                )
+            requested[param] = names
+        fields = requested[FIELDS_PARAM] or available
+        return [
+            name for name in available
+            if name in fields and name not in requested[EXCLUDE_PARAM]
+        ]
+
+    def get_serializer(self, *args, **kwargs):
+        if self.sparse_fields is not None:
+            kwargs.setdefault('fields', self.sparse_fields)
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.sparse_fields is None:
+            return queryset
+        return narrow_queryset(queryset, self.sparse_fields)
+
+
+def narrow_queryset(queryset, fields):
+    """ Откладывает столбцы, которых нет в fields, и убирает
+    JOIN и prefetch для невыводимых связей. Не откладываются поля
+    сортировки (нужны курсорной пагинации) и внешний ключ на
+    родителя в querysets связанного менеджера (title.reviews):
+    менеджер читает его у каждой записи.
+    """
+    opts = queryset.model._meta
+    ordering = queryset.query.order_by or opts.ordering
+    keep = {
+        *fields,
+        *(name.lstrip('-') for name in ordering),
+        *(field.name for field in queryset._known_related_objects),
+    }
+    deferred = [
+        field.name for field in opts.concrete_fields
+        if not field.primary_key and field.name not in keep
+    ]
+    related = queryset.query.select_related
+    if isinstance(related, dict) and set(related) - set(fields):
+        # select_related() без аргументов включил бы все связи.
+        remaining = [name for name in related if name in fields]
+        queryset = queryset.select_related(None)
+        if remaining:
+            queryset = queryset.select_related(*remaining)
+    lookups = queryset._prefetch_related_lookups
+    if set(lookups) - set(fields):
+        queryset = queryset.prefetch_related(None).prefetch_related(
+            *(lookup for lookup in lookups if lookup in fields)
+        )
+    return queryset.defer(*deferred)
@@ -1,11 +1,14 @@
+from django.conf import settings
 from django.urls import path, include
 
 from rest_framework.routers import DefaultRouter
 
+from .asynchronous import async_read_urls
 from .views import (
     ReviewViewSet, CommentViewSet, TitleViewSet,
     GenreViewSet, CategoryViewSet, AddUserViewSet,
-    GetUserTokenViewSet, UserViewSet,
+    GetUserTokenViewSet, UserViewSet, SearchViewSet, MetricsViewSet,
+    ChangeViewSet,
 )
 
 router = DefaultRouter()
@@ -29,6 +32,21 @@ router.register(
     GenreViewSet,
     basename='genres'
 )
+router.register(
+    'search',
+    SearchViewSet,
+    basename='search'
+)
+router.register(
+    'changes',
+    ChangeViewSet,
+    basename='changes'
+)
+router.register(
+    '_metrics',
+    MetricsViewSet,
+    basename='metrics'
+)
 router.register(
     r'titles/(?P<title_id>\d+)/reviews',
     ReviewViewSet,
@@ -40,6 +58,12 @@ router.register(
     basename='comments'
 )
 
+router_urls = router.urls
+if settings.ASYNC_READ_VIEWS:
+    router_urls = async_read_urls(
+        router_urls, ('titles', 'reviews', 'comments')
+    )
+
 urlpatterns = (
     path(
         'auth/signup/',
@@ -53,6 +77,6 @@ urlpatterns = (
     ),
     path(
         '',
-        include(router.urls)
+        include(router_urls)
     ),
 )
@@ -1,8 +1,7 @@
 from django.db import IntegrityError
-from django.db.models import Avg
 from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
 
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
@@ -10,17 +9,30 @@ from rest_framework.filters import SearchFilter
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
 
 from reviews.models import (
-    Title, Genre, Category
+    Title, Genre, Category, Review
 )
+from api.metrics import registry
+from reviews.aggregates import SCORE_FIELDS, score_stats
+from reviews.changes import read_changes
+from reviews.leaderboards import top_titles
+from reviews.lookups import category_slugs, genre_slugs
+from reviews.search import KINDS, build_match, search
+from reviews.similarity import similar_titles
+from reviews.trending import trending_titles
 from users.models import User
+from users.outbox import enqueue_mail
+from users.tokens import RoleAccessToken
 
 from .serializers import (
     ReviewSerializer, CommentSerializer, GenreSerializer,
     CategorySerializer, GetTitleSerializer, TitleSerializer,
     AddUserSerializer, UserSerializer, GetUserTokenSerializer,
+    SearchResultSerializer, TopTitleSerializer, TopTitlesQuerySerializer,
+    TrendingQuerySerializer, TrendingTitleSerializer,
+    SimilarQuerySerializer, SimilarTitleSerializer, TitleStatsSerializer,
+    ChangesQuerySerializer,
 )
 from .filters import TitleFilter
 from .permissions import (
@@ -28,7 +40,12 @@ from .permissions import (
     AdminModerAuthorUserOrReadOnly, AdminSuperPermission
 )
 from .mixins import ListCreateDestroyMixin
-from api_yamdb.settings import EMAIL_HOST_USER
+from .cache import CachedListMixin, CachedResponseMixin
+from .pagination import SwitchablePaginationMixin
+from .sparse import SparseFieldsMixin
+from .fast import FastListMixin, FastRendererMixin
+from .changes import serialize_changes
+from api_yamdb.settings import SEARCH_MAX_RESULTS
 
 
 class AddUserViewSet(viewsets.ModelViewSet):
@@ -46,7 +63,8 @@ class AddUserViewSet(viewsets.ModelViewSet):
 
     def create(self, request, *args, **kwargs):
         """ Высылаем код подтверждения, для получения токена,
-        на почту пользователя!
+        на почту пользователя! Письмо ставится в очередь и уходит
+        командой send_mail_outbox, ответ не ждёт почтовый сервер.
         """
         serializer = AddUserSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -60,12 +78,10 @@ class AddUserViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         confirmation_code = default_token_generator.make_token(user)
-        send_mail(
+        enqueue_mail(
+            user,
             'Код для регистрации пользователя!',
             f'Код подтверждения: {confirmation_code}',
-            EMAIL_HOST_USER,
-            (user.email,),
-            fail_silently=False,
         )
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -88,7 +104,7 @@ class GetUserTokenViewSet(viewsets.ModelViewSet):
         )
         confirmation_code = serializer.validated_data.get('confirmation_code')
         if default_token_generator.check_token(user, confirmation_code):
-            token = AccessToken.for_user(user)
+            token = RoleAccessToken.for_user(user)
             return Response(
                 {"token": str(token)},
                 status=status.HTTP_200_OK
@@ -115,11 +131,11 @@ class UserViewSet(viewsets.ModelViewSet):
     def edit_profile(self, request):
         user = get_object_or_404(
             User,
-            username=request.user.username
+            pk=request.user.id
         )
         if request.method == 'PATCH':
             serializer = UserSerializer(
-                self.request.user,
+                user,
                 data=request.data,
                 partial=True
             )
@@ -130,8 +146,9 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class CategoryViewSet(ListCreateDestroyMixin):
+class CategoryViewSet(CachedListMixin, ListCreateDestroyMixin):
 
+    cache_groups = ('categories',)
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = (AdminOrReadOnlyPermission,)
@@ -140,8 +157,9 @@ class CategoryViewSet(ListCreateDestroyMixin):
     lookup_field = 'slug'
 
 
-class GenreViewSet(ListCreateDestroyMixin):
+class GenreViewSet(CachedListMixin, ListCreateDestroyMixin):
 
+    cache_groups = ('genres',)
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = (AdminOrReadOnlyPermission,)
@@ -150,11 +168,17 @@ class GenreViewSet(ListCreateDestroyMixin):
     lookup_field = 'slug'
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(
+    CachedResponseMixin,
+    FastListMixin,
+    SparseFieldsMixin,
+    viewsets.ModelViewSet,
+):
+    cache_groups = ('titles',)
     queryset = (
-        Title.objects.all().annotate(
-            Avg('reviews__score')
-        ).order_by('name')
+        Title.objects.select_related('category')
+        .prefetch_related('genre')
+        .order_by('name')
     )
     serializer_class = TitleSerializer
     permission_classes = (
@@ -166,12 +190,94 @@ class TitleViewSet(viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'head', 'patch', 'delete']
 
     def get_serializer_class(self):
+        if self.action == 'top':
+            return TopTitleSerializer
+        if self.action == 'trending':
+            return TrendingTitleSerializer
+        if self.action == 'similar':
+            return SimilarTitleSerializer
+        if self.action == 'stats':
+            return TitleStatsSerializer
         if self.action in ('list', 'retrieve'):
             return GetTitleSerializer
         return TitleSerializer
 
+    @action(detail=False)
+    def top(self, request):
+        """ Лучшие произведения: by=rating (взвешенный рейтинг,
+        по умолчанию) или by=reviews (больше всего отзывов), фильтры
+        category и genre (slug), year, limit - размер списка.
+        """
+        return self.cached_response(self.get_top, request)
+
+    def get_top(self, request):
+        query = TopTitlesQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = dict(query.validated_data)
+        for name, slugs in (
+            ('category', category_slugs),
+            ('genre', genre_slugs),
+        ):
+            if name in params:
+                obj = slugs.get(params.pop(name))
+                if obj is None:
+                    return Response([])
+                params[f'{name}_id'] = obj.pk
+        serializer = self.get_serializer(top_titles(**params), many=True)
+        return Response(serializer.data)
+
+    @action(detail=True)
+    def stats(self, request, pk=None):
+        """ Гистограмма, средняя и медиана оценок произведения
+        по сохранённым счётчикам - один запрос по первичному ключу.
+        """
+        return self.cached_response(self.get_stats, request, pk)
 
-class CommentViewSet(viewsets.ModelViewSet):
+    def get_stats(self, request, pk):
+        title = get_object_or_404(
+            Title.objects.only('reviews_count', 'rating', *SCORE_FIELDS),
+            pk=pk,
+        )
+        return Response(self.get_serializer(score_stats(title)).data)
+
+    @action(detail=True)
+    def similar(self, request, pk=None):
+        """ Похожие произведения по оценкам пользователей и жанрам,
+        limit - размер списка. Соседи рассчитаны заранее
+        manage.py refresh_similar_titles.
+        """
+        return self.cached_response(self.get_similar, request, pk)
+
+    def get_similar(self, request, pk):
+        query = SimilarQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        titles = similar_titles(pk, **query.validated_data)
+        if not titles:
+            get_object_or_404(Title.objects.only('pk'), pk=pk)
+        serializer = self.get_serializer(titles, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False)
+    def trending(self, request):
+        """ Популярные сейчас произведения, limit - размер списка.
+        Популярность затухает со временем, поэтому ответ не кэшируется:
+        читается limit строк по индексу.
+        """
+        query = TrendingQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        serializer = self.get_serializer(
+            trending_titles(**query.validated_data), many=True
+        )
+        return Response(serializer.data)
+
+
+class CommentViewSet(
+    CachedResponseMixin,
+    FastListMixin,
+    SparseFieldsMixin,
+    SwitchablePaginationMixin,
+    viewsets.ModelViewSet,
+):
 
     serializer_class = CommentSerializer
     permission_classes = (
@@ -179,33 +285,41 @@ class CommentViewSet(viewsets.ModelViewSet):
     )
     http_method_names = ['get', 'post', 'head', 'patch', 'delete']
 
-    def title(self):
-        return (
-            get_object_or_404(
-                Title,
-                id=self.kwargs.get('title_id')
-            )
-        )
-
+    @cached_property
     def review(self):
-        return (
-            get_object_or_404(
-                self.title().reviews,
-                id=self.kwargs.get('review_id')
-            )
+        """ Отзыв и его произведение одним запросом,
+        с проверкой принадлежности отзыва произведению.
+        """
+        return get_object_or_404(
+            Review.objects.select_related('title'),
+            id=self.kwargs.get('review_id'),
+            title_id=self.kwargs.get('title_id'),
         )
 
+    @cached_property
+    def title(self):
+        return self.review.title
+
+    def get_cache_groups(self):
+        return (f'comments:{self.kwargs.get("review_id")}', 'users')
+
     def get_queryset(self):
-        return self.review().comments.all()
+        return self.review.comments.select_related('author')
 
     def perform_create(self, serializer):
         serializer.save(
-            author=self.request.user,
-            review=self.review()
+            author_id=self.request.user.id,
+            review=self.review
         )
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(
+    CachedResponseMixin,
+    FastListMixin,
+    SparseFieldsMixin,
+    SwitchablePaginationMixin,
+    viewsets.ModelViewSet,
+):
 
     serializer_class = ReviewSerializer
     permission_classes = (
@@ -213,19 +327,94 @@ class ReviewViewSet(viewsets.ModelViewSet):
     )
     http_method_names = ['get', 'post', 'head', 'patch', 'delete']
 
+    @cached_property
     def title(self):
-        return (
-            get_object_or_404(
-                Title,
-                id=self.kwargs.get('title_id')
-            )
+        return get_object_or_404(
+            Title,
+            id=self.kwargs.get('title_id')
         )
 
+    def get_cache_groups(self):
+        return (f'reviews:{self.kwargs.get("title_id")}', 'users')
+
     def get_queryset(self):
-        return self.title().reviews.all()
+        return self.title.reviews.select_related('author', 'title')
 
     def perform_create(self, serializer):
         serializer.save(
-            author=self.request.user,
-            title=self.title()
+            author_id=self.request.user.id,
+            title=self.title
+        )
+
+
+class MetricsViewSet(viewsets.ViewSet):
+    """ Метрики представлений этого процесса: число запросов,
+    гистограммы числа SQL-запросов и времени (db, serialize, render,
+    total, мс), превышения бюджетов METRICS_BUDGETS. POST на reset/
+    сбрасывает накопленное. Права доступа: Администратор.
+    """
+
+    permission_classes = (AdminSuperPermission,)
+
+    def list(self, request):
+        return Response(registry.snapshot())
+
+    @action(detail=False, methods=['post'])
+    def reset(self, request):
+        registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ChangeViewSet(FastRendererMixin, viewsets.ViewSet):
+    """ Журнал изменений произведений, отзывов, комментариев, жанров,
+    категорий и пользователей для инкрементальной синхронизации.
+    Параметры: since - курсор, limit - размер пачки, model - одна
+    модель. В ответе next - курсор следующего запроса, has_more -
+    есть ли ещё изменения, у каждого изменения data - текущее
+    состояние записи. Права доступа: Администратор.
+    """
+
+    permission_classes = (AdminSuperPermission,)
+
+    def list(self, request):
+        query = ChangesQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        changes = read_changes(
+            params['since'], params['limit'] + 1, params.get('model')
+        )
+        has_more = len(changes) > params['limit']
+        changes = changes[:params['limit']]
+        return Response({
+            'next': changes[-1].id if changes else params['since'],
+            'has_more': has_more,
+            'results': serialize_changes(changes),
+        })
+
+
+class SearchViewSet(viewsets.GenericViewSet):
+    """ Полнотекстовый поиск по произведениям и отзывам,
+    результаты упорядочены по релевантности. Параметры:
+    q - строка поиска, type - title или review (по умолчанию оба).
+    Права доступа: Доступно без токена.
+    """
+
+    serializer_class = SearchResultSerializer
+    permission_classes = (ReadOnlyPermission,)
+
+    def list(self, request):
+        query = request.query_params.get('q', '')
+        if build_match(query) is None:
+            return Response(
+                {'q': ['Нужно хотя бы одно слово из 3 и более символов!']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        kind = request.query_params.get('type')
+        results = search(
+            query,
+            kinds=(kind,) if kind in KINDS else KINDS,
+            limit=SEARCH_MAX_RESULTS,
         )
+        page = self.paginate_queryset(results)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
@@ -38,10 +38,12 @@ INSTALLED_APPS = [
     'reviews.apps.ReviewsConfig',
     'users.apps.UsersConfig',
     'api.apps.ApiConfig',
+    'benchmarks.apps.BenchmarksConfig',
     'django_filters',
 ]
 
 MIDDLEWARE = [
+    'benchmarks.middleware.CaptureMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -49,6 +51,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.MetricsMiddleware',
 ]
 
 ROOT_URLCONF = 'api_yamdb.urls'
@@ -83,6 +86,28 @@ DATABASES = {
 }
 
 
+# Cache
+
+# locmem живёт в памяти одного процесса: при нескольких воркерах
+# инвалидация через сигналы видна только в своём процессе, поэтому
+# в продакшене нужен общий бэкэнд (filebased, memcached, redis).
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'api_yamdb'),
+    }
+}
+
+# Время жизни кэшированных ответов API, сек.
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', 300))
+
+# Время жизни справочников категорий и жанров в памяти процесса, сек.
+SLUG_CACHE_TTL = int(os.getenv('SLUG_CACHE_TTL', 60))
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -124,7 +149,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.v1.authentication.RoleJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -133,11 +158,95 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 5,
 }
 
+# Взвешенный рейтинг произведений: RATING_PRIOR_WEIGHT воображаемых
+# оценок RATING_PRIOR_MEAN добавляются к настоящим (0 - обычная
+# средняя). После изменения - manage.py refresh_aggregates.
+RATING_PRIOR_WEIGHT = int(os.getenv('RATING_PRIOR_WEIGHT', 5))
+RATING_PRIOR_MEAN = float(os.getenv('RATING_PRIOR_MEAN', 5.5))
+# Размер списка /api/v1/titles/top/ по умолчанию и наибольший.
+TOP_TITLES_LIMIT = 10
+TOP_TITLES_MAX_LIMIT = 100
+
+# Популярность произведений для /api/v1/titles/trending/: вес отзыва
+# TRENDING_REVIEW_WEIGHT * оценка / 10, вес комментария
+# TRENDING_COMMENT_WEIGHT, оба затухают вдвое за TRENDING_HALF_LIFE
+# часов. Строки с популярностью ниже TRENDING_MIN_SCORE удаляет
+# manage.py compact_trends. После изменения - compact_trends --rebuild.
+TRENDING_HALF_LIFE = float(os.getenv('TRENDING_HALF_LIFE', 48))
+TRENDING_REVIEW_WEIGHT = float(os.getenv('TRENDING_REVIEW_WEIGHT', 1))
+TRENDING_COMMENT_WEIGHT = float(os.getenv('TRENDING_COMMENT_WEIGHT', 0.2))
+TRENDING_MIN_SCORE = float(os.getenv('TRENDING_MIN_SCORE', 0.01))
+
+# Похожие произведения (/api/v1/titles/{id}/similar/): сколько соседей
+# хранится у произведения и доля сходства по жанрам (остальное - по
+# оценкам). manage.py refresh_similar_titles читает отзывы порциями
+# по SIMILAR_READ_CHUNK строк и считает сходство блоками не больше
+# SIMILAR_BLOCK_CELLS ячеек (8 байт каждая).
+SIMILAR_TITLES_COUNT = int(os.getenv('SIMILAR_TITLES_COUNT', 10))
+SIMILAR_GENRE_WEIGHT = float(os.getenv('SIMILAR_GENRE_WEIGHT', 0.3))
+SIMILAR_READ_CHUNK = int(os.getenv('SIMILAR_READ_CHUNK', 100000))
+SIMILAR_BLOCK_CELLS = int(os.getenv('SIMILAR_BLOCK_CELLS', 2 ** 22))
+
+# Размер пачки журнала изменений /api/v1/changes/ по умолчанию
+# и наибольший.
+CHANGES_LIMIT = 1000
+CHANGES_MAX_LIMIT = 5000
+
+# Сколько лучших совпадений отдаёт /api/v1/search/.
+SEARCH_MAX_RESULTS = 100
+
+# Пагинация отзывов и комментариев: 'page' - по номеру страницы,
+# 'cursor' - по курсору (pub_date, id). Меняется параметром ?pagination=.
+FEED_PAGINATION = os.getenv('FEED_PAGINATION', 'page')
+
+# Списки произведений, отзывов и комментариев собираются через
+# values() без ModelSerializer (api/v1/fast.py), вывод тот же.
+FAST_SERIALIZATION = os.getenv('FAST_SERIALIZATION', 'True') == 'True'
+
+# Асинхронный путь чтения произведений, отзывов и комментариев.
+# Включать только при запуске под ASGI (uvicorn): под WSGI каждый
+# запрос к асинхронному представлению поднимает событийный цикл.
+# ASYNC_READ_THREADS - размер пула потоков для запросов к БД.
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', 'False') == 'True'
+ASYNC_READ_THREADS = int(os.getenv('ASYNC_READ_THREADS', 16))
+
+# Метрики запросов (api/middleware.py): заголовок Server-Timing
+# и /api/v1/_metrics/. Бюджеты - по имени представления
+# 'Класс.действие': {'queries': N, 'ms': M}; превышение пишется
+# в лог, а при METRICS_BUDGETS_RAISE (в тестах) - ошибка.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+METRICS_SERVER_TIMING = os.getenv('METRICS_SERVER_TIMING', 'True') == 'True'
+METRICS_BUDGETS = {
+    'TitleViewSet.list': {'queries': 4, 'ms': 300},
+    'TitleViewSet.retrieve': {'queries': 3, 'ms': 200},
+    'ReviewViewSet.list': {'queries': 4, 'ms': 300},
+    'CommentViewSet.list': {'queries': 4, 'ms': 300},
+}
+METRICS_BUDGETS_RAISE = (
+    os.getenv('METRICS_BUDGETS_RAISE', 'False') == 'True'
+)
+
+# Запись доли запросов для bench_capture_replay
+# (benchmarks/middleware.py): requests.jsonl в CAPTURE_DIR
+# с ротацией по размеру. Поля тела из CAPTURE_REDACT не пишутся.
+CAPTURE_ENABLED = os.getenv('CAPTURE_ENABLED', 'False') == 'True'
+CAPTURE_SAMPLE_RATE = float(os.getenv('CAPTURE_SAMPLE_RATE', 0.01))
+CAPTURE_DIR = os.getenv('CAPTURE_DIR', os.path.join(BASE_DIR, 'capture'))
+CAPTURE_MAX_BYTES = 50 * 1024 * 1024
+CAPTURE_BACKUPS = 10
+CAPTURE_QUEUE_SIZE = 10000
+CAPTURE_MAX_BODY = 10 * 1024
+CAPTURE_REDACT = ('password', 'confirmation_code', 'token', 'email')
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=10),
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_USER_CLASS': 'users.tokens.RoleTokenUser',
 }
 
+# Время жизни в кэше состояния пользователя для проверки токенов, сек.
+USER_CACHE_TIMEOUT = int(os.getenv('USER_CACHE_TIMEOUT', 300))
+
 # E-mail configurations
 
 # Локальный файловый бэкэнд для почты
@@ -153,5 +262,13 @@ EMAIL_PORT = os.getenv('EMAIL_PORT')
 EMAIL_USE_SSL = os.getenv('EMAIL_USE_SSL')
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 
+# Очередь исходящей почты (команда send_mail_outbox): число попыток,
+# первая пауза перед повтором и её предел (пауза удваивается), сек.,
+# и на сколько письмо откладывается, пока воркер его отправляет.
+MAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('MAIL_OUTBOX_MAX_ATTEMPTS', 5))
+MAIL_OUTBOX_RETRY_DELAY = int(os.getenv('MAIL_OUTBOX_RETRY_DELAY', 30))
+MAIL_OUTBOX_MAX_RETRY_DELAY = 60 * 60
+MAIL_OUTBOX_LEASE = 5 * 60
+
 AUTH_USER_MODEL = 'users.User'
 CSV_FILES_DIR = os.path.join(BASE_DIR, 'static/data')
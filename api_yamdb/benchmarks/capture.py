@@ -0,0 +1,88 @@
+import atexit
+import json
+import logging
+import os
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from queue import Full, Queue
+from threading import Lock
+
+from django.conf import settings
+
+CAPTURE_FILE = 'requests.jsonl'
+REDACTED = '***'
+
+logger = logging.getLogger('benchmarks.capture')
+logger.propagate = False
+
+_listener = None
+_lock = Lock()
+
+
+class DroppingQueueHandler(QueueHandler):
+    """ Кладёт запись в очередь, не дожидаясь места: если писатель
+    не успевает, запись отбрасывается и учитывается в dropped.
+    """
+
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # Сообщение уже строка JSON, форматировать нечего.
+        return record
+
+
+def start():
+    """ Запускает фоновый поток записи (один на процесс). Файлы
+    ротируются по CAPTURE_MAX_BYTES, хранится CAPTURE_BACKUPS старых:
+    requests.jsonl.1, requests.jsonl.2...
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return
+        os.makedirs(settings.CAPTURE_DIR, exist_ok=True)
+        file_handler = RotatingFileHandler(
+            os.path.join(settings.CAPTURE_DIR, CAPTURE_FILE),
+            maxBytes=settings.CAPTURE_MAX_BYTES,
+            backupCount=settings.CAPTURE_BACKUPS,
+            encoding='utf-8',
+        )
+        file_handler.setFormatter(logging.Formatter('%(message)s'))
+        queue = Queue(maxsize=settings.CAPTURE_QUEUE_SIZE)
+        logger.addHandler(DroppingQueueHandler(queue))
+        logger.setLevel(logging.INFO)
+        _listener = QueueListener(queue, file_handler)
+        _listener.start()
+        atexit.register(stop)
+
+
+def stop():
+    """ Дописывает очередь на диск и останавливает поток. """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def capture(record):
+    logger.info(json.dumps(record, ensure_ascii=False))
+
+
+def redact(body):
+    """ Значения полей CAPTURE_REDACT (пароли, коды, почта)
+    заменяются на '***' на любом уровне вложенности.
+    """
+    if isinstance(body, dict):
+        return {
+            key: REDACTED if key in settings.CAPTURE_REDACT else redact(value)
+            for key, value in body.items()
+        }
+    if isinstance(body, list):
+        return [redact(value) for value in body]
+    return body
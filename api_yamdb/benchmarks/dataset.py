@@ -0,0 +1,176 @@
+import random
+from math import ceil
+
+from django.db import models, transaction
+from django.db.models.deletion import get_candidate_relations_to_delete
+
+from reviews.aggregates import refresh_counters, refresh_ratings
+from reviews.models import (
+    Category, Comment, Genre, GenreTitle, Review, Title
+)
+from reviews.search import rebuild_index
+from reviews.signals import data_changed
+from reviews.trending import rebuild_trends
+from users.models import User
+
+# Всё сгенерированное помечено префиксом и удаляется clear().
+PREFIX = 'bench'
+CATEGORIES = 5
+GENRES = 20
+WORDS = (
+    'фильм сюжет актёры музыка финал режиссёр герой история сцена '
+    'книга автор глава стиль ритм звук альбом песня голос драма '
+    'комедия скучно отлично сильно слабо неожиданно красиво долго'
+).split()
+
+
+def parse_count(value):
+    """ '10k', '100k', '1M' или число -> int. """
+    value = str(value).strip()
+    multiplier = {'k': 10**3, 'm': 10**6}.get(value[-1:].lower(), 1)
+    if multiplier > 1:
+        value = value[:-1]
+    return int(float(value) * multiplier)
+
+
+def chunked(count, size):
+    for start in range(0, count, size):
+        yield range(start, min(start + size, count))
+
+
+def text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def raw_delete(queryset):
+    """ Удаляет записи queryset и зависящие от них (CASCADE, SET_NULL)
+    DELETE и UPDATE по подзапросам, без загрузки строк и без сигналов:
+    коллектор delete() вызвал бы обработчики рейтингов, кэша
+    и журнала изменений на каждую строку.
+    """
+    # Те же связи, что обходит коллектор, включая скрытые (related_name='+').
+    for relation in get_candidate_relations_to_delete(queryset.model._meta):
+        related = relation.related_model._base_manager.filter(
+            **{f'{relation.field.name}__in': queryset.values('pk')}
+        )
+        if relation.on_delete is models.SET_NULL:
+            related.update(**{relation.field.name: None})
+        else:
+            raw_delete(related)
+    queryset._raw_delete(queryset.db)
+
+
+def clear():
+    """ Удаляет сгенерированные данные вместе со связанными отзывами,
+    комментариями и жанрами произведений. Сигналы не вызываются,
+    поэтому поисковый индекс и популярность пересобираются.
+    """
+    with transaction.atomic():
+        raw_delete(Title.objects.filter(name__startswith=f'{PREFIX} '))
+        raw_delete(User.objects.filter(username__startswith=f'{PREFIX}_'))
+        raw_delete(Category.objects.filter(slug__startswith=f'{PREFIX}-'))
+        raw_delete(Genre.objects.filter(slug__startswith=f'{PREFIX}-'))
+    rebuild_index()
+    rebuild_trends()
+    data_changed.send(sender=clear)
+
+
+def bulk_create(model, objects, batch_size):
+    with transaction.atomic():
+        model.objects.bulk_create(objects, batch_size=batch_size)
+
+
+def generated_ids(queryset):
+    return list(queryset.order_by('id').values_list('id', flat=True))
+
+
+def generate(reviews, titles=None, comments=0.5, seed=0, batch_size=5000,
+             progress=None):
+    """ Синтетический набор данных через модели reviews: reviews
+    отзывов на titles произведений (по умолчанию сотая часть
+    отзывов), comments комментариев на отзыв в среднем. Каждый
+    пользователь пишет по отзыву на каждое произведение подряд,
+    поэтому пар (произведение, автор) хватает без повторов.
+    Одинаковый seed даёт одинаковые данные.
+    """
+    rng = random.Random(seed)
+    progress = progress or (lambda message: None)
+    titles = titles or max(10, reviews // 100)
+    users = ceil(reviews / titles)
+
+    bulk_create(Category, [
+        Category(name=f'{PREFIX} категория {i}', slug=f'{PREFIX}-c{i}')
+        for i in range(CATEGORIES)
+    ], batch_size)
+    bulk_create(Genre, [
+        Genre(name=f'{PREFIX} жанр {i}', slug=f'{PREFIX}-g{i}')
+        for i in range(GENRES)
+    ], batch_size)
+    category_ids = generated_ids(
+        Category.objects.filter(slug__startswith=f'{PREFIX}-')
+    )
+    genre_ids = generated_ids(
+        Genre.objects.filter(slug__startswith=f'{PREFIX}-')
+    )
+    for chunk in chunked(users, batch_size):
+        bulk_create(User, [
+            User(
+                username=f'{PREFIX}_{i}',
+                email=f'{PREFIX}_{i}@example.com',
+            )
+            for i in chunk
+        ], batch_size)
+    user_ids = generated_ids(
+        User.objects.filter(username__startswith=f'{PREFIX}_')
+    )
+    progress(f'Пользователей: {len(user_ids)}')
+    for chunk in chunked(titles, batch_size):
+        bulk_create(Title, [
+            Title(
+                name=f'{PREFIX} {text(rng, 2)} {i}',
+                year=rng.randint(1950, 2023),
+                description=text(rng, rng.randint(5, 60)),
+                category_id=rng.choice(category_ids),
+            )
+            for i in chunk
+        ], batch_size)
+    title_ids = generated_ids(
+        Title.objects.filter(name__startswith=f'{PREFIX} ')
+    )
+    for chunk in chunked(len(title_ids), batch_size):
+        bulk_create(GenreTitle, [
+            GenreTitle(title_id=title_ids[i], genre_id=genre_id)
+            for i in chunk
+            for genre_id in rng.sample(genre_ids, rng.randint(1, 3))
+        ], batch_size)
+    progress(f'Произведений: {len(title_ids)}')
+    for number, chunk in enumerate(chunked(reviews, batch_size)):
+        bulk_create(Review, [
+            Review(
+                title_id=title_ids[i % len(title_ids)],
+                author_id=user_ids[i // len(title_ids)],
+                text=text(rng, rng.randint(5, 80)),
+                score=rng.randint(1, 10),
+            )
+            for i in chunk
+        ], batch_size)
+        progress(f'Отзывов: {chunk.stop}')
+    review_ids = generated_ids(
+        Review.objects.filter(author__username__startswith=f'{PREFIX}_')
+    )
+    total = int(len(review_ids) * comments)
+    for chunk in chunked(total, batch_size):
+        bulk_create(Comment, [
+            Comment(
+                review_id=rng.choice(review_ids),
+                author_id=rng.choice(user_ids),
+                text=text(rng, rng.randint(3, 30)),
+            )
+            for _ in chunk
+        ], batch_size)
+        progress(f'Комментариев: {chunk.stop}')
+    refresh_ratings()
+    refresh_counters()
+    rebuild_index()
+    rebuild_trends()
+    data_changed.send(sender=generate)
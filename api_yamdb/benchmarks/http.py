@@ -0,0 +1,103 @@
+import asyncio
+from time import perf_counter
+from urllib.parse import urlsplit
+
+
+class HttpError(Exception):
+    pass
+
+
+async def read_response(reader):
+    """ Читает один ответ HTTP/1.1, возвращает код статуса. """
+    head = await reader.readuntil(b'\r\n\r\n')
+    status_line, *header_lines = head.decode('latin-1').split('\r\n')
+    status = int(status_line.split(' ', 2)[1])
+    headers = {}
+    for line in header_lines:
+        if ':' in line:
+            key, value = line.split(':', 1)
+            headers[key.strip().lower()] = value.strip()
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                break
+    return status, headers.get('connection') == 'close'
+
+
+async def _client(target, paths, deadline, headers, results):
+    host, port, path_index = target['host'], target['port'], 0
+    reader = writer = None
+    while perf_counter() < deadline:
+        path = paths[path_index % len(paths)]
+        path_index += 1
+        started = perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            writer.write(
+                f'GET {path} HTTP/1.1\r\nHost: {target["netloc"]}\r\n'
+                f'{headers}\r\n'.encode()
+            )
+            status, close = await read_response(reader)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            results['errors'] += 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            continue
+        results['latencies'].append(perf_counter() - started)
+        if status >= 400:
+            results['errors'] += 1
+        if close:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run_load(url, paths, concurrency, duration, headers=None):
+    """ concurrency постоянных соединений в течение duration секунд
+    запрашивают paths по кругу. Возвращает задержки и число ошибок.
+    """
+    parts = urlsplit(url)
+    target = {
+        'host': parts.hostname,
+        'port': parts.port or 80,
+        'netloc': parts.netloc,
+    }
+    extra = ''.join(
+        f'{key}: {value}\r\n' for key, value in (headers or {}).items()
+    )
+    results = {'latencies': [], 'errors': 0}
+    deadline = perf_counter() + duration
+    await asyncio.gather(*(
+        _client(
+            target, paths[shift:] + paths[:shift], deadline, extra, results
+        )
+        for shift in (
+            number % len(paths) for number in range(concurrency)
+        )
+    ))
+    return results
+
+
+def percentile(values, share):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def summarize(results, duration):
+    latencies = results['latencies']
+    return {
+        'requests': len(latencies),
+        'errors': results['errors'],
+        'rps': len(latencies) / duration,
+        'p50': percentile(latencies, 0.5) * 1000,
+        'p99': percentile(latencies, 0.99) * 1000,
+    }
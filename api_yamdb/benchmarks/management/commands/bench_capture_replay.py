@@ -0,0 +1,83 @@
+import json
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.replay import (
+    CapturePlan, HttpTarget, InProcessTarget, load_capture, replay
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Повторяет записанный CaptureMiddleware трафик с исходными '
+        'интервалами, ускоренными в --rate раз!'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'files',
+            nargs='+',
+            help='Файлы записи (capture/requests.jsonl*)',
+        )
+        parser.add_argument(
+            '--url',
+            help='Адрес запущенного сервера; без него - WSGI в процессе',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=8,
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            default=1.0,
+            help='Во сколько раз быстрее записи, 0 - без пауз',
+        )
+        parser.add_argument(
+            '--safe-only',
+            action='store_true',
+            help='Повторять только GET и HEAD',
+        )
+        parser.add_argument(
+            '--output',
+            help='Сохранить отчёт в JSON для bench_compare',
+        )
+
+    def handle(self, *args, **options):
+        entries = load_capture(options['files'])
+        if options['safe_only']:
+            entries = [
+                entry for entry in entries
+                if entry['method'] in ('GET', 'HEAD')
+            ]
+        if not entries:
+            raise CommandError('В записи нет запросов!')
+        url = options['url']
+        report = replay(
+            CapturePlan(entries, options['rate']),
+            (lambda: HttpTarget(url)) if url else InProcessTarget,
+            options['concurrency'],
+        )
+        report = {
+            'label': f'capture x{options["rate"]}',
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'target': url or InProcessTarget.label,
+            'files': options['files'],
+            'concurrency': options['concurrency'],
+            **report,
+        }
+        for name, stats in report['endpoints'].items():
+            self.stdout.write(
+                f'{name}: {stats["count"]} запр., '
+                f'p50 {stats["p50"]} мс, p95 {stats["p95"]} мс, '
+                f'p99 {stats["p99"]} мс, ошибок {stats["errors"]}'
+            )
+        self.stdout.write(
+            f'Всего: {report["requests"]} запр. за {report["duration"]} с, '
+            f'{report["rps"]} запр./с, ошибок {report["errors"]}'
+        )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
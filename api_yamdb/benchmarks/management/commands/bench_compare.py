@@ -0,0 +1,38 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.replay import compare
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as report:
+        return json.load(report)
+
+
+class Command(BaseCommand):
+    help = 'Сравнение двух отчётов bench_replay, поиск регрессий!'
+
+    def add_arguments(self, parser):
+        parser.add_argument('base', help='Отчёт базового прогона')
+        parser.add_argument('new', help='Отчёт нового прогона')
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.1,
+            help='Допустимое ухудшение p95/p99 и rps, доля (0.1 = 10%%)',
+        )
+
+    def handle(self, *args, **options):
+        lines, regressions = compare(
+            load_report(options['base']),
+            load_report(options['new']),
+            options['threshold'],
+        )
+        for line in lines:
+            self.stdout.write(line)
+        if regressions:
+            raise CommandError(
+                'Регрессии: ' + '; '.join(regressions)
+            )
+        self.stdout.write('Регрессий нет!')
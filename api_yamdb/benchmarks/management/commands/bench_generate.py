@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks.dataset import clear, generate, parse_count
+
+
+class Command(BaseCommand):
+    help = 'Синтетический набор данных для нагрузочных тестов!'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reviews',
+            type=parse_count,
+            default=parse_count('10k'),
+            help='Число отзывов: 10k, 100k, 1M или число',
+        )
+        parser.add_argument(
+            '--titles',
+            type=parse_count,
+            help='Число произведений (по умолчанию - отзывов / 100)',
+        )
+        parser.add_argument(
+            '--comments',
+            type=float,
+            default=0.5,
+            help='Комментариев на отзыв в среднем',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Только удалить ранее сгенерированные данные',
+        )
+
+    def handle(self, *args, **options):
+        clear()
+        if options['clear']:
+            self.stdout.write('Сгенерированные данные удалены!')
+            return
+        generate(
+            options['reviews'],
+            titles=options['titles'],
+            comments=options['comments'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            progress=self.stdout.write,
+        )
+        self.stdout.write('Данные сгенерированы!')
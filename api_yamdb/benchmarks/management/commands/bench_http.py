@@ -0,0 +1,90 @@
+import asyncio
+import resource
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.http import run_load, summarize
+
+DEFAULT_PATHS = (
+    '/api/v1/titles/',
+    '/api/v1/titles/{title_id}/',
+    '/api/v1/titles/{title_id}/reviews/',
+    '/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузка на запущенный сервер: запросы в секунду и задержки '
+        'при разном числе одновременных соединений!'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            default='http://127.0.0.1:8000',
+            help='Адрес запущенного сервера',
+        )
+        parser.add_argument(
+            '--label',
+            default='',
+            help='Подпись прогона в отчёте, например wsgi или asgi',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            nargs='+',
+            default=[50, 200, 1000],
+            help='Число одновременных соединений, несколько значений',
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=30,
+            help='Длительность каждого прогона, сек.',
+        )
+        parser.add_argument(
+            '--path',
+            action='append',
+            dest='paths',
+            help='Запрашиваемый путь, можно указать несколько раз',
+        )
+        parser.add_argument(
+            '--title-id',
+            type=int,
+            default=1,
+        )
+        parser.add_argument(
+            '--review-id',
+            type=int,
+            default=1,
+        )
+
+    def handle(self, *args, **options):
+        paths = [
+            path.format(
+                title_id=options['title_id'],
+                review_id=options['review_id'],
+            )
+            for path in options['paths'] or DEFAULT_PATHS
+        ]
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        needed = max(options['concurrency']) + 64
+        if soft < needed:
+            if hard != resource.RLIM_INFINITY and hard < needed:
+                raise CommandError(
+                    f'Лимит открытых файлов {hard} меньше {needed}'
+                )
+            resource.setrlimit(resource.RLIMIT_NOFILE, (needed, hard))
+        for concurrency in options['concurrency']:
+            results = asyncio.run(run_load(
+                options['url'], paths, concurrency, options['duration']
+            ))
+            stats = summarize(results, options['duration'])
+            self.stdout.write(
+                f'{options["label"]} c={concurrency}: '
+                f'{stats["rps"]:.1f} запр./с, '
+                f'p50 {stats["p50"]:.1f} мс, '
+                f'p99 {stats["p99"]:.1f} мс, '
+                f'ошибок {stats["errors"]} из {stats["requests"]}'
+            )
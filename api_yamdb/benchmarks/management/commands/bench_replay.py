@@ -0,0 +1,81 @@
+import json
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from benchmarks.replay import (
+    HttpTarget, InProcessTarget, RequestPlan, load_mix, replay
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Воспроизводит смесь запросов из JSONL и считает пропускную '
+        'способность и p50/p95/p99 по представлениям!'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'mix',
+            help='Файл смеси запросов (benchmarks/mixes/*.jsonl)',
+        )
+        parser.add_argument(
+            '--url',
+            help='Адрес запущенного сервера; без него - WSGI в процессе',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=1000,
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=1,
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+        )
+        parser.add_argument(
+            '--label',
+            default='',
+        )
+        parser.add_argument(
+            '--output',
+            help='Сохранить отчёт в JSON для bench_compare',
+        )
+
+    def handle(self, *args, **options):
+        plan = RequestPlan(
+            load_mix(options['mix']), options['requests'], options['seed']
+        )
+        url = options['url']
+        report = replay(
+            plan,
+            (lambda: HttpTarget(url)) if url else InProcessTarget,
+            options['concurrency'],
+        )
+        report = {
+            'label': options['label'],
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'target': url or InProcessTarget.label,
+            'mix': options['mix'],
+            'seed': options['seed'],
+            'concurrency': options['concurrency'],
+            **report,
+        }
+        for name, stats in report['endpoints'].items():
+            self.stdout.write(
+                f'{name}: {stats["count"]} запр., {stats["rps"]} запр./с, '
+                f'p50 {stats["p50"]} мс, p95 {stats["p95"]} мс, '
+                f'p99 {stats["p99"]} мс, ошибок {stats["errors"]}'
+            )
+        self.stdout.write(
+            f'Всего: {report["requests"]} запр. за {report["duration"]} с, '
+            f'{report["rps"]} запр./с, ошибок {report["errors"]}'
+        )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
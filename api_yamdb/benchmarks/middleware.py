@@ -0,0 +1,89 @@
+import asyncio
+import json
+import random
+from time import perf_counter, time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject, empty
+from rest_framework.permissions import SAFE_METHODS
+
+from api.v1.cache import get_role
+
+from .capture import capture, redact, start
+
+
+class CaptureMiddleware(MiddlewareMixin):
+    """ Записывает долю CAPTURE_SAMPLE_RATE запросов в JSONL для
+    bench_capture_replay: метод, путь с параметрами, роль вместо
+    пользователя, тело запросов на запись (без паролей и кодов),
+    статус и время ответа. Запись идёт в фоновом потоке, запрос
+    не ждёт диска. Включается CAPTURE_ENABLED. Под ASGI работает
+    асинхронно.
+    """
+
+    def __init__(self, get_response):
+        if not settings.CAPTURE_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        start()
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if random.random() >= settings.CAPTURE_SAMPLE_RATE:
+            return self.get_response(request)
+        body = self.get_body(request)
+        started = perf_counter()
+        response = self.get_response(request)
+        latency = perf_counter() - started
+        self.record(
+            request, get_role(request.user), body, response, latency
+        )
+        return response
+
+    async def __acall__(self, request):
+        if random.random() >= settings.CAPTURE_SAMPLE_RATE:
+            return await self.get_response(request)
+        body = self.get_body(request)
+        started = perf_counter()
+        response = await self.get_response(request)
+        latency = perf_counter() - started
+        user = request.user
+        if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+            # Пользователь сессии не загружен (не DRF) - запрос к БД
+            # нельзя выполнять в событийном цикле.
+            role = await sync_to_async(get_role)(user)
+        else:
+            role = get_role(user)
+        self.record(request, role, body, response, latency)
+        return response
+
+    def record(self, request, role, body, response, latency):
+        record = {
+            'ts': round(time(), 3),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'role': role,
+            'status': response.status_code,
+            'latency_ms': round(latency * 1000, 3),
+        }
+        if body is not None:
+            record['body'] = body
+        capture(record)
+
+    def get_body(self, request):
+        """ Тело читается до представления: после разбора DRF
+        поток запроса уже прочитан.
+        """
+        if request.method in SAFE_METHODS:
+            return None
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+        if not length or length > settings.CAPTURE_MAX_BODY:
+            return None
+        try:
+            return redact(json.loads(request.body))
+        except ValueError:
+            return None
@@ -0,0 +1,325 @@
+import json
+import random
+import re
+from collections import defaultdict
+from http.client import HTTPConnection
+from itertools import count
+from threading import Lock, Thread
+from time import perf_counter, sleep
+from urllib.parse import urlsplit
+
+from django.db import close_old_connections
+from django.test import Client
+
+from reviews.models import Review, Title
+from users.models import ADMIN, MODERATOR, USER, User
+from users.tokens import RoleAccessToken
+
+from .http import percentile
+
+ID_RE = re.compile(r'/\d+(?=/|$)')
+
+
+def load_mix(path):
+    """ Смесь запросов из JSONL: по объекту на строку с полями
+    path, method (GET), weight (1), user (username, без него -
+    анонимно), body (JSON тела) и name (имя для отчёта). В path
+    можно писать {title_id} и {review_id} - подставляются id
+    случайных записей из БД.
+    """
+    entries = []
+    with open(path, encoding='utf-8') as mix_file:
+        for line in mix_file:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            entry.setdefault('method', 'GET')
+            entry['method'] = entry['method'].upper()
+            entry.setdefault('weight', 1)
+            entry.setdefault('name', endpoint_name(
+                entry['method'], entry['path']
+            ))
+            entries.append(entry)
+    return entries
+
+
+def endpoint_name(method, path):
+    """ 'GET /api/v1/titles/{id}/reviews/' - запросы к одному
+    представлению с разными id и параметрами в одну строку отчёта.
+    """
+    path = path.split('?', 1)[0]
+    path = re.sub(r'\{\w+\}', '{id}', ID_RE.sub('/{id}', path))
+    return f'{method} {path}'
+
+
+def load_tokens(entries):
+    """ Токены для запросов смеси: по username из поля user или,
+    для записанного трафика, по роли из поля role - от первого
+    пользователя с этой ролью.
+    """
+    tokens = {
+        user.username: str(RoleAccessToken.for_user(user))
+        for user in User.objects.filter(username__in={
+            entry['user'] for entry in entries if entry.get('user')
+        })
+    }
+    role_filters = {
+        'superuser': {'is_superuser': True},
+        ADMIN: {'role': ADMIN, 'is_superuser': False},
+        MODERATOR: {'role': MODERATOR, 'is_superuser': False},
+        USER: {'role': USER, 'is_superuser': False},
+    }
+    for role in {entry.get('role') for entry in entries}:
+        if role not in role_filters:
+            continue
+        user = User.objects.filter(
+            is_active=True, **role_filters[role]
+        ).order_by('id').first()
+        if user is not None:
+            tokens[f'role:{role}'] = str(RoleAccessToken.for_user(user))
+    return tokens
+
+
+class BasePlan:
+
+    def headers(self, entry):
+        token = self.tokens.get(entry.get('user')) or self.tokens.get(
+            f'role:{entry.get("role")}'
+        )
+        if token is None:
+            return {}
+        return {'Authorization': f'Bearer {token}'}
+
+
+def sample_ids(model, rng, size):
+    """ Случайные id записей model. id читаются по первичному
+    ключу, без сортировки таблицы, и выборка повторяется при одном
+    seed на тех же данных.
+    """
+    ids = list(model.objects.order_by('pk').values_list('pk', flat=True))
+    return sorted(rng.sample(ids, min(size, len(ids))))
+
+
+class RequestPlan(BasePlan):
+    """ Последовательность запросов, одинаковая при одном seed. """
+
+    def __init__(self, entries, total, seed=0, sample_size=1000):
+        rng = random.Random(seed)
+        title_ids = sample_ids(Title, rng, sample_size)
+        reviews = list(
+            Review.objects.filter(
+                pk__in=sample_ids(Review, rng, sample_size)
+            ).order_by('pk').values_list('id', 'title_id')
+        )
+        weights = [entry['weight'] for entry in entries]
+        self.requests = []
+        for entry in rng.choices(entries, weights, k=total):
+            params = {}
+            if '{review_id}' in entry['path'] and reviews:
+                params['review_id'], params['title_id'] = rng.choice(
+                    reviews
+                )
+            elif '{title_id}' in entry['path'] and title_ids:
+                params['title_id'] = rng.choice(title_ids)
+            self.requests.append({
+                **entry,
+                'path': entry['path'].format(**params),
+            })
+        self.tokens = load_tokens(entries)
+
+
+def load_capture(paths):
+    """ Записанные CaptureMiddleware запросы из нескольких файлов
+    в порядке времени.
+    """
+    entries = []
+    for path in paths:
+        with open(path, encoding='utf-8') as capture_file:
+            entries.extend(
+                json.loads(line) for line in capture_file if line.strip()
+            )
+    entries.sort(key=lambda entry: entry['ts'])
+    for entry in entries:
+        entry['name'] = endpoint_name(entry['method'], entry['path'])
+    return entries
+
+
+class CapturePlan(BasePlan):
+    """ Записанный трафик с исходными интервалами между запросами,
+    сжатыми в rate раз (rate=0 - без пауз, как можно быстрее).
+    """
+
+    def __init__(self, entries, rate=1.0):
+        first = entries[0]['ts'] if entries else 0
+        self.requests = [
+            {**entry, 'at': (entry['ts'] - first) / rate if rate else 0}
+            for entry in entries
+        ]
+        self.tokens = load_tokens(entries)
+
+
+class InProcessTarget:
+    """ Запросы к WSGI-приложению в этом процессе через тестовый
+    клиент Django: полный стек middleware, без сети.
+    """
+
+    label = 'in-process'
+
+    def __init__(self):
+        self.client = Client()
+
+    def send(self, entry, headers):
+        response = self.client.generic(
+            entry['method'],
+            entry['path'],
+            json.dumps(entry['body']) if 'body' in entry else '',
+            content_type='application/json',
+            **{
+                f'HTTP_{key.upper().replace("-", "_")}': value
+                for key, value in headers.items()
+            },
+        )
+        return response.status_code
+
+    def close(self):
+        close_old_connections()
+
+
+class HttpTarget:
+    """ Запросы к запущенному серверу по постоянному соединению. """
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.label = url
+        self.connection = HTTPConnection(parts.hostname, parts.port or 80)
+
+    def send(self, entry, headers):
+        body = json.dumps(entry['body']) if 'body' in entry else None
+        try:
+            self.connection.request(
+                entry['method'],
+                entry['path'],
+                body=body,
+                headers={'Content-Type': 'application/json', **headers},
+            )
+            response = self.connection.getresponse()
+            response.read()
+        except OSError:
+            # Следующий запрос откроет новое соединение.
+            self.connection.close()
+            raise
+        if response.getheader('Connection') == 'close':
+            self.connection.close()
+        return response.status
+
+    def close(self):
+        self.connection.close()
+
+
+def replay(plan, make_target, concurrency=1):
+    """ Выполняет план в concurrency потоках, у каждого своя цель
+    (клиент или соединение). Запрос с полем at (сек. от начала)
+    отправляется не раньше этого времени. Возвращает отчёт
+    по представлениям.
+    """
+    numbers = count()
+    lock = Lock()
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+
+    def worker():
+        target = make_target()
+        try:
+            while True:
+                with lock:
+                    number = next(numbers)
+                if number >= len(plan.requests):
+                    return
+                entry = plan.requests[number]
+                delay = run_started + entry.get('at', 0) - perf_counter()
+                if delay > 0:
+                    sleep(delay)
+                status, elapsed = send(target, entry, plan.headers(entry))
+                with lock:
+                    samples[entry['name']].append(elapsed)
+                    if status >= 400:
+                        errors[entry['name']] += 1
+        finally:
+            target.close()
+
+    run_started = perf_counter()
+    threads = [Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = perf_counter() - run_started
+    return {
+        'duration': round(duration, 3),
+        'requests': len(plan.requests),
+        'errors': sum(errors.values()),
+        'rps': round(len(plan.requests) / duration, 2),
+        'endpoints': {
+            name: endpoint_stats(latencies, errors[name], duration)
+            for name, latencies in sorted(samples.items())
+        },
+    }
+
+
+def send(target, entry, headers):
+    """ Статус ответа (599 - ошибка соединения) и время, сек. """
+    started = perf_counter()
+    try:
+        status = target.send(entry, headers)
+    except OSError:
+        status = 599
+    return status, perf_counter() - started
+
+
+def endpoint_stats(latencies, errors, duration):
+    return {
+        'count': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / duration, 2),
+        'mean': round(sum(latencies) / len(latencies) * 1000, 3),
+        **{
+            name: round(percentile(latencies, share) * 1000, 3)
+            for name, share in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99))
+        },
+    }
+
+
+def compare(base, new, threshold):
+    """ Сравнивает два отчёта по представлениям. Регрессия -
+    рост p95/p99 или падение rps больше чем на threshold (доля).
+    Возвращает строки отчёта и список регрессий.
+    """
+    lines, regressions = [], []
+    for name in sorted(set(base['endpoints']) | set(new['endpoints'])):
+        before = base['endpoints'].get(name)
+        after = new['endpoints'].get(name)
+        if before is None or after is None:
+            lines.append(f'{name}: только в одном из прогонов')
+            continue
+        changes = {
+            metric: change(before[metric], after[metric])
+            for metric in ('rps', 'p50', 'p95', 'p99')
+        }
+        lines.append(f'{name}: ' + ', '.join(
+            f'{metric} {before[metric]} -> {after[metric]} ({value:+.0%})'
+            for metric, value in changes.items()
+        ))
+        worse = [
+            metric for metric, value in changes.items()
+            if metric in ('p95', 'p99') and value > threshold
+            or metric == 'rps' and value < -threshold
+        ]
+        if worse:
+            regressions.append(f'{name}: {", ".join(worse)}')
+    return lines, regressions
+
+
+def change(before, after):
+    if not before:
+        return 0
+    return (after - before) / before
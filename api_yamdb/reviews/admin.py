@@ -24,7 +24,9 @@ class TitleAdmin(admin.ModelAdmin):
         'id',
         'name',
         'year',
-        'category'
+        'category',
+        'rating',
+        'reviews_count',
     )
 
 
@@ -0,0 +1,269 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Avg, Case, Count, ExpressionWrapper, F, FloatField, OuterRef, Q,
+    Subquery, Sum, Value, When
+)
+from django.db.models.functions import Cast, Coalesce
+
+from users.models import User
+from .changes import log_changes
+from .models import Comment, GenreTitle, Review, Title
+
+SCORES = range(1, 11)
+# Счётчики гистограммы оценок в Title.
+SCORE_FIELDS = tuple(f'score_{score}' for score in SCORES)
+
+
+def weighted_rating(score_sum, reviews_count):
+    """ Байесовская средняя: к оценкам произведения добавляются
+    RATING_PRIOR_WEIGHT воображаемых оценок RATING_PRIOR_MEAN, и одна
+    десятка не поднимает произведение на первое место. При весе 0 -
+    обычная средняя. Выражение для UPDATE.
+    """
+    weight = settings.RATING_PRIOR_WEIGHT
+    return ExpressionWrapper(
+        (Value(weight * settings.RATING_PRIOR_MEAN) + Cast(
+            score_sum, FloatField()
+        )) / (Value(weight) + reviews_count),
+        output_field=FloatField(),
+    )
+
+
+def if_reviewed(reviews_count, expression):
+    """ NULL для произведений без отзывов. """
+    return Case(
+        When(reviews_count, then=expression),
+        default=Value(None),
+        output_field=FloatField(),
+    )
+
+
+def shift_rating(title_id, old_score=None, new_score=None):
+    """ Инкрементально заменяет оценку old_score на new_score (None -
+    отзыва не было или не стало): сумма оценок, количество отзывов
+    и счётчики гистограммы сдвигаются одним UPDATE, средняя оценка
+    пересчитывается там же, похожие произведения помечаются
+    к пересчёту. UPDATE не вызывает сигналов - изменение записывается
+    в журнал здесь, в транзакции сохранения отзыва.
+    """
+    old_score = None if old_score is None else int(old_score)
+    new_score = None if new_score is None else int(new_score)
+    if old_score == new_score:
+        return
+    count_delta = (new_score is not None) - (old_score is not None)
+    score_sum = F('score_sum') + (new_score or 0) - (old_score or 0)
+    reviews_count = F('reviews_count') + count_delta
+    reviewed = Q(reviews_count__gt=-count_delta)
+    slots = {}
+    if old_score is not None:
+        slots[f'score_{old_score}'] = F(f'score_{old_score}') - 1
+    if new_score is not None:
+        slots[f'score_{new_score}'] = F(f'score_{new_score}') + 1
+    Title.objects.filter(pk=title_id).update(
+        **slots,
+        score_sum=score_sum,
+        reviews_count=reviews_count,
+        rating=if_reviewed(reviewed, ExpressionWrapper(
+            Cast(score_sum, FloatField()) / reviews_count,
+            output_field=FloatField(),
+        )),
+        weighted_rating=if_reviewed(
+            reviewed, weighted_rating(score_sum, reviews_count)
+        ),
+        similar_stale=True,
+    )
+    sync_genre_ranks((title_id,))
+    log_changes('title', (title_id,))
+
+
+def sync_genre_ranks(title_ids=None):
+    """ Копирует рейтинг и число отзывов произведений в их связи
+    с жанрами.
+    """
+    title = Title.objects.filter(pk=OuterRef('title_id'))
+    links = GenreTitle.objects.all()
+    if title_ids is not None:
+        links = links.filter(title_id__in=title_ids)
+    return links.update(
+        weighted_rating=Subquery(title.values('weighted_rating')[:1]),
+        reviews_count=Subquery(title.values('reviews_count')[:1]),
+    )
+
+
+def refresh_ratings(title_ids=None):
+    """ Полностью пересчитывает рейтинги по таблице отзывов,
+    произведения с расхождениями записывает в журнал изменений.
+    Возвращает количество обновлённых произведений.
+    """
+    with transaction.atomic():
+        drift = find_rating_drift()
+        if title_ids is not None:
+            drift = drift.filter(pk__in=title_ids)
+        log_changes('title', list(drift.values_list('pk', flat=True)))
+        return _refresh_ratings(title_ids)
+
+
+def _refresh_ratings(title_ids):
+    reviews = (
+        Review.objects.filter(title=OuterRef('pk'))
+        .order_by()
+        .values('title')
+    )
+    titles = Title.objects.all()
+    if title_ids is not None:
+        titles = titles.filter(pk__in=title_ids)
+    updated = titles.update(
+        score_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')),
+            0,
+        ),
+        reviews_count=Coalesce(
+            Subquery(reviews.annotate(total=Count('id')).values('total')),
+            0,
+        ),
+        rating=Subquery(
+            reviews.annotate(average=Avg('score')).values('average')
+        ),
+        **{
+            field: Coalesce(Subquery(
+                reviews.filter(score=score)
+                .annotate(total=Count('id')).values('total')
+            ), 0)
+            for score, field in zip(SCORES, SCORE_FIELDS)
+        },
+    )
+    titles.update(weighted_rating=if_reviewed(
+        Q(reviews_count__gt=0),
+        weighted_rating(F('score_sum'), F('reviews_count')),
+    ))
+    sync_genre_ranks(title_ids)
+    return updated
+
+
+def find_rating_drift():
+    """ Произведения, у которых сохранённые агрегаты
+    не совпадают с реальными данными отзывов.
+    """
+    return (
+        Title.objects.annotate(
+            actual_sum=Coalesce(Sum('reviews__score'), 0),
+            actual_count=Count('reviews'),
+            **{
+                f'actual_{field}': Count(
+                    'reviews', filter=Q(reviews__score=score)
+                )
+                for score, field in zip(SCORES, SCORE_FIELDS)
+            },
+        )
+        .exclude(
+            score_sum=F('actual_sum'),
+            reviews_count=F('actual_count'),
+            **{field: F(f'actual_{field}') for field in SCORE_FIELDS},
+        )
+        .order_by('pk')
+    )
+
+
+def shift_review_count(author_id, delta):
+    User.objects.filter(pk=author_id).update(
+        reviews_count=F('reviews_count') + delta
+    )
+    log_changes('user', (author_id,))
+
+
+def shift_comment_count(review_id, author_id, delta):
+    """ Счётчики комментариев отзыва и автора - атомарные UPDATE
+    с F(), без чтения текущих значений. Записи журнала изменений -
+    в транзакции сохранения комментария.
+    """
+    Review.objects.filter(pk=review_id).update(
+        comments_count=F('comments_count') + delta
+    )
+    User.objects.filter(pk=author_id).update(
+        comments_count=F('comments_count') + delta
+    )
+    log_changes('review', (review_id,))
+    log_changes('user', (author_id,))
+
+
+def count_subquery(model, field):
+    """ Количество записей model, у которых field - внешний ключ
+    на текущую строку, 0 - если записей нет.
+    """
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('id'))
+        .values('total')
+    ), 0)
+
+
+# Счётчик -> (модель, поле счётчика, считаемая модель, внешний ключ).
+COUNTERS = (
+    (Review, 'comments_count', Comment, 'review'),
+    (User, 'reviews_count', Review, 'author'),
+    (User, 'comments_count', Comment, 'author'),
+)
+
+
+def find_counter_drift():
+    """ Записи, у которых сохранённые счётчики комментариев и отзывов
+    не совпадают с таблицами: (запись, поле, сохранено, на самом деле).
+    """
+    for model, field, counted, key in COUNTERS:
+        for row in counter_drift(model, field, counted, key):
+            yield row, field, getattr(row, field), row.actual
+
+
+def counter_drift(model, field, counted, key):
+    return (
+        model.objects.annotate(actual=count_subquery(counted, key))
+        .exclude(**{field: F('actual')})
+        .order_by('pk')
+    )
+
+
+def refresh_counters():
+    """ Пересчитывает счётчики комментариев и отзывов по таблицам,
+    записи с расхождениями записывает в журнал изменений.
+    """
+    with transaction.atomic():
+        for model, field, counted, key in COUNTERS:
+            log_changes(model._meta.model_name, list(
+                counter_drift(model, field, counted, key)
+                .values_list('pk', flat=True)
+            ))
+            model.objects.update(**{field: count_subquery(counted, key)})
+
+
+def score_stats(title):
+    """ Гистограмма, средняя и медиана оценок по сохранённым
+    счётчикам произведения, без чтения отзывов.
+    """
+    histogram = {
+        score: getattr(title, field)
+        for score, field in zip(SCORES, SCORE_FIELDS)
+    }
+    return {
+        'reviews_count': title.reviews_count,
+        'mean': title.rating,
+        'median': histogram_median(histogram, title.reviews_count),
+        'scores': histogram,
+    }
+
+
+def histogram_median(histogram, total):
+    """ Медиана по гистограмме: при чётном числе отзывов - среднее
+    двух центральных оценок. None - отзывов нет.
+    """
+    if total <= 0:
+        return None
+    middle = ((total - 1) // 2, total // 2)
+    found, seen = [], 0
+    for score, count in histogram.items():
+        seen += count
+        while len(found) < 2 and middle[len(found)] < seen:
+            found.append(score)
+    return sum(found) / 2 if len(found) == 2 else None
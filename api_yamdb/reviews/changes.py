@@ -0,0 +1,31 @@
+from .models import SAVE, Change
+
+# Модели в журнале изменений, значения Change.model.
+TRACKED = ('category', 'genre', 'title', 'review', 'comment', 'user')
+
+
+def log_change(instance, action=SAVE):
+    Change.objects.create(
+        model=instance._meta.model_name,
+        object_id=instance.pk,
+        action=action,
+    )
+
+
+def log_changes(model_name, object_ids, action=SAVE):
+    """ Записи массовой загрузки одним INSERT. """
+    Change.objects.bulk_create(
+        Change(model=model_name, object_id=object_id, action=action)
+        for object_id in object_ids
+    )
+
+
+def read_changes(since=0, limit=1000, model=None):
+    """ Изменения после курсора since по возрастанию id: выборка
+    по первичному ключу (для model - по индексу (model, id))
+    без OFFSET, время не зависит от длины журнала.
+    """
+    changes = Change.objects.filter(pk__gt=since)
+    if model is not None:
+        changes = changes.filter(model=model)
+    return list(changes.order_by('pk')[:limit])
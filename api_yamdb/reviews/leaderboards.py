@@ -0,0 +1,42 @@
+from .models import GenreTitle, Title
+
+RATING, REVIEWS = 'rating', 'reviews'
+# Вид рейтинга -> сохранённое поле, по убыванию которого он строится.
+RANKINGS = {
+    RATING: 'weighted_rating',
+    REVIEWS: 'reviews_count',
+}
+
+
+def top_title_ids(by=RATING, category_id=None, genre_id=None, year=None,
+                  limit=10):
+    """ id лучших произведений. Выборка идёт по индексу сохранённого
+    рейтинга (для жанра - по его копии в GenreTitle) и останавливается
+    на limit строках, поэтому время не зависит от числа отзывов.
+    Произведения без отзывов в рейтинг не попадают.
+    """
+    field = RANKINGS[by]
+    if genre_id is None:
+        queryset, prefix, pk = Title.objects.all(), '', 'pk'
+    else:
+        queryset = GenreTitle.objects.filter(genre_id=genre_id)
+        prefix, pk = 'title__', 'title_id'
+    if category_id is not None:
+        queryset = queryset.filter(**{f'{prefix}category_id': category_id})
+    if year is not None:
+        queryset = queryset.filter(**{f'{prefix}year': year})
+    return list(
+        queryset.filter(reviews_count__gt=0)
+        .order_by(f'-{field}', pk)
+        .values_list(pk, flat=True)[:limit]
+    )
+
+
+def top_titles(**kwargs):
+    ids = top_title_ids(**kwargs)
+    titles = (
+        Title.objects.select_related('category')
+        .prefetch_related('genre')
+        .in_bulk(ids)
+    )
+    return [titles[pk] for pk in ids if pk in titles]
@@ -0,0 +1,72 @@
+from threading import Lock
+from time import monotonic
+
+from django.conf import settings
+
+from .models import Category, Genre
+
+
+class SlugCache:
+    """ Справочник slug -> объект в памяти процесса для маленьких
+    и редко меняющихся таблиц. Таблица перечитывается целиком по
+    истечении ttl или после вытеснения сигналом. Версия отсекает
+    загрузку, начатую до вытеснения.
+    """
+
+    def __init__(self, model, ttl=None):
+        self.model = model
+        self.ttl = ttl
+        self.version = 0
+        self._objects = None
+        self._loaded_at = 0
+        self._lock = Lock()
+
+    def __deepcopy__(self, memo):
+        # Кэш общий для процесса, поля сериализаторов не копируют его.
+        return self
+
+    def evict(self):
+        with self._lock:
+            self.version += 1
+            self._objects = None
+
+    def _expired(self):
+        ttl = settings.SLUG_CACHE_TTL if self.ttl is None else self.ttl
+        return monotonic() - self._loaded_at > ttl
+
+    def all(self):
+        objects = self._objects
+        if objects is not None and not self._expired():
+            return objects
+        version = self.version
+        objects = {obj.slug: obj for obj in self.model.objects.all()}
+        with self._lock:
+            if version == self.version:
+                self._objects = objects
+                self._loaded_at = monotonic()
+        return objects
+
+    def get(self, slug):
+        """ Объект по slug, при промахе - точечный запрос в БД:
+        запись могли создать в другом процессе.
+        """
+        obj = self.all().get(slug)
+        if obj is None:
+            obj = self.model.objects.filter(slug=slug).first()
+            if obj is not None:
+                with self._lock:
+                    if self._objects is not None:
+                        self._objects = {**self._objects, slug: obj}
+        return obj
+
+    def ids_containing(self, value):
+        """ id записей, в slug которых есть value без учёта регистра. """
+        value = value.lower()
+        return [
+            obj.pk for slug, obj in self.all().items()
+            if value in slug.lower()
+        ]
+
+
+category_slugs = SlugCache(Category)
+genre_slugs = SlugCache(Genre)
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.trending import compact_trends, rebuild_trends
+
+
+class Command(BaseCommand):
+    help = 'Сжатие таблицы популярности произведений!'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help=(
+                'Пересчитать популярность по свежим отзывам '
+                'и комментариям'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            with transaction.atomic():
+                kept = rebuild_trends()
+            self.stdout.write(f'Популярность пересчитана: {kept} произв.')
+            return
+        deleted = compact_trends()
+        self.stdout.write(f'Удалены затухшие строки: {deleted}')
@@ -1,12 +1,30 @@
 import csv
+import io
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from time import monotonic
 
-from django.shortcuts import get_object_or_404
-from django.core.management.base import BaseCommand
+import django
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 
+from reviews.aggregates import refresh_counters, refresh_ratings
+from reviews.changes import TRACKED, log_changes
+from reviews.search import rebuild_index
+from reviews.signals import data_changed
+from reviews.trending import rebuild_trends
 from reviews.models import (
     Category, Genre, Title, GenreTitle, Review, Comment
 )
+from users.cache import evict_auth_state
 from users.models import User
+from users.signals import AUTH_FIELDS
 
 # Важен порядок загрузки, чтобы соблюдались связи в таблицах!!!
 CSV_BASE = (
@@ -19,45 +37,405 @@ CSV_BASE = (
     ('genre_title.csv', GenreTitle),
 )
 
-MODELS_FIELDS = {
-    'category': Category,
-    'genre': Genre,
-    'title': Title,
-    'review': Review,
-    'author': User,
-}
+ON_CONFLICT = ('ignore', 'update', 'error')
+
+CHECKPOINT_FILE = 'load_data_CSV.checkpoint.json'
+REJECTS_FILE = 'load_data_CSV.rejects.csv'
+
+
+class RowError(ValueError):
+    pass
+
+
+def read_records(csv_file):
+    """ Читает бинарный csv по записям и отдаёт (смещение конца
+    записи, байты записи). Запись может занимать несколько строк,
+    если перевод строки стоит внутри кавычек.
+    """
+    record = b''
+    for line in iter(csv_file.readline, b''):
+        record += line
+        if record.count(b'"') % 2 == 0:
+            yield csv_file.tell(), record
+            record = b''
+    if record:
+        yield csv_file.tell(), record
+
+
+def resolve_fields(model, columns):
+    """ Колонки csv -> поля модели. Колонки внешних ключей
+    называются и по полю (category), и по attname (title_id).
+    """
+    try:
+        return tuple(
+            (column, model._meta.get_field(column))
+            for column in columns
+        )
+    except Exception as err:
+        raise CommandError(f'{model.__name__}: {err}')
+
+
+def parse_row(fields, row):
+    if len(row) != len(fields):
+        raise RowError(
+            f'ожидалось {len(fields)} колонок, получено {len(row)}'
+        )
+    values = {}
+    for (column, field), value in zip(fields, row):
+        if field.is_relation:
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise RowError(f'{column}={value!r} не является id')
+        else:
+            try:
+                value = field.to_python(value)
+                field.run_validators(value)
+            except Exception as err:
+                raise RowError(f'{column}: {err}')
+        values[field.attname] = value
+    return values
+
+
+def parse_records(model_label, columns, records):
+    """ Разбор и проверка пачки записей. Выполняется в процессе
+    пула, поэтому получает модель по метке, а не объектом.
+    """
+    fields = resolve_fields(apps.get_model(model_label), columns)
+    rows, rejects = [], []
+    for offset, record in records:
+        text = record.decode('utf-8', 'replace')
+        try:
+            row = next(
+                csv.reader(io.StringIO(record.decode('utf-8'), newline='')),
+                None,
+            )
+            if row:
+                rows.append((offset, text, parse_row(fields, row)))
+        except (RowError, csv.Error, UnicodeDecodeError) as err:
+            rejects.append((offset, text, str(err)))
+    return rows, rejects, records[-1][0]
+
+
+def chunked(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
 
 
 class Command(BaseCommand):
     help = 'Загрузка данных из csv файлов!'
 
     def add_arguments(self, parser):
-        parser.add_argument('--path', type=str, help='Путь к файлу')
+        parser.add_argument(
+            '--path',
+            type=str,
+            default=settings.CSV_FILES_DIR,
+            help='Путь к каталогу с csv файлами',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество строк в одной транзакции',
+        )
+        parser.add_argument(
+            '--on-conflict',
+            choices=ON_CONFLICT,
+            default='ignore',
+            help='Что делать со строками, уже существующими в БД: '
+                 'пропустить, обновить или прервать загрузку',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=0,
+            help='Процессов для разбора csv, 0 - разбирать в текущем',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Продолжить прерванную загрузку с контрольной точки',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            type=str,
+            default=CHECKPOINT_FILE,
+            help='Файл контрольных точек загрузки',
+        )
+        parser.add_argument(
+            '--rejects',
+            type=str,
+            default=REJECTS_FILE,
+            help='Файл для строк, не прошедших проверку',
+        )
 
     def handle(self, *args, **options):
-        print(f'Загрузка данных в БД ...')
-        for item in CSV_BASE:
-            file_path = f'static/data/{item[0]}'
-            model = item[1]
-            with open(file_path, 'rt', encoding='utf-8') as csv_file:
-                reader = csv.reader(csv_file, delimiter=',')
-                columns: list = []
-                i: int = 0
-                for row in reader:
-                    if i == 0:
-                        columns.extend(row)
-                    elif i > 0:
-                        row_to_base: dict = {}
-                        for j in range(0, len(row)):
-                            if columns[j] in MODELS_FIELDS.keys():
-                                temp_model = MODELS_FIELDS[columns[j]]
-                                row[j] = get_object_or_404(temp_model, pk=row[j])
-                            row_to_base.update({columns[j]: row[j]})
-                        try:
-                            obj, created = model.objects.get_or_create(**row_to_base)
-                            if not created:
-                                print(f"{obj} уже существует!")
-                        except Exception as err:
-                            print(f"NB Ошибка в строке {row}: {err}")
-                    i += 1
-        print('Загрузка данных в БД завершена!!!')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше 0!')
+        self.batch_size = options['batch_size']
+        self.on_conflict = options['on_conflict']
+        self.checkpoint_path = options['checkpoint']
+        self.checkpoint = (
+            self.read_checkpoint() if options['resume'] else {}
+        )
+        self.known_ids = {}
+        self.workers = options['workers']
+        self.pool = None
+        if self.workers > 0:
+            # Один писатель - этот процесс, пул только разбирает строки.
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=django.setup,
+            )
+        self.rejects_path = options['rejects']
+        self.rejects_file = None
+        self.stdout.write('Загрузка данных в БД ...')
+        try:
+            for file_name, model in CSV_BASE:
+                file_path = os.path.join(options['path'], file_name)
+                if not os.path.exists(file_path):
+                    self.stderr.write(
+                        f'Файл {file_path} не найден, пропускаем'
+                    )
+                    continue
+                self.load_file(file_path, model)
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+            if self.rejects_file is not None:
+                self.rejects_file.close()
+                self.stderr.write(
+                    f'Отклонённые строки записаны в {self.rejects_path}'
+                )
+        # bulk_create не вызывает сигналы - пересчитываем рейтинги,
+        # счётчики, поисковый индекс и популярность разом.
+        refresh_ratings()
+        refresh_counters()
+        rebuild_index()
+        rebuild_trends()
+        data_changed.send(sender=self.__class__)
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        self.stdout.write('Загрузка данных в БД завершена!!!')
+
+    def read_checkpoint(self):
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def save_checkpoint(self, file_name, state):
+        self.checkpoint[file_name] = state
+        temp_path = f'{self.checkpoint_path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.checkpoint, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.checkpoint_path)
+
+    def file_state(self, file_name, file_path):
+        """ Контрольная точка файла. Если файл изменился
+        с прошлой загрузки, начинаем его с начала.
+        """
+        stat = os.stat(file_path)
+        state = self.checkpoint.get(file_name, {})
+        if (
+            (state.get('size'), state.get('mtime'))
+            != (stat.st_size, stat.st_mtime)
+        ):
+            if state:
+                self.stderr.write(f'{file_name} изменился, грузим заново')
+            state = {'size': stat.st_size, 'mtime': stat.st_mtime}
+        return state
+
+    def load_file(self, file_path, model):
+        file_name = os.path.basename(file_path)
+        state = self.file_state(file_name, file_path)
+        if state.get('done'):
+            self.stdout.write(f'{file_name}: уже загружен, пропускаем')
+            return
+        started = monotonic()
+        loaded = rejected = 0
+        # Контрольная точка пишется после COMMIT пачки: если процесс
+        # упал между ними, первая пачка после возобновления уже в БД.
+        resumed = state.get('started', False)
+        if not resumed:
+            state['started'] = True
+            self.save_checkpoint(file_name, state)
+        with open(file_path, 'rb') as csv_file:
+            records = read_records(csv_file)
+            _, header = next(records, (0, b''))
+            columns = next(csv.reader([header.decode('utf-8-sig')]), [])
+            fields = resolve_fields(model, columns)
+            if state.get('offset'):
+                csv_file.seek(state['offset'])
+                records = read_records(csv_file)
+            parse = partial(parse_records, model._meta.label, columns)
+            for rows, rejects, offset in self.parse_chunks(parse, records):
+                objs = []
+                for row_offset, text, values in rows:
+                    try:
+                        self.check_relations(fields, values)
+                        objs.append(model(**values))
+                    except RowError as err:
+                        rejects.append((row_offset, text, str(err)))
+                try:
+                    self.write_chunk(model, objs, fields, resumed)
+                except IntegrityError as err:
+                    raise CommandError(f'{file_path}: {err}')
+                resumed = False
+                self.write_rejects(file_name, rejects)
+                loaded += len(objs)
+                rejected += len(rejects)
+                state['offset'] = offset
+                self.save_checkpoint(file_name, state)
+        state['done'] = True
+        self.save_checkpoint(file_name, state)
+        elapsed = monotonic() - started
+        self.stdout.write(
+            f'{file_name}: {loaded} строк '
+            f'(отклонено {rejected}) за {elapsed:.2f} с, '
+            f'{loaded / elapsed if elapsed else loaded:.0f} строк/с'
+        )
+
+    def write_rejects(self, file_name, rejects):
+        if not rejects:
+            return
+        if self.rejects_file is None:
+            self.rejects_file = open(
+                self.rejects_path, 'a', encoding='utf-8', newline=''
+            )
+        writer = csv.writer(self.rejects_file)
+        for offset, text, error in rejects:
+            writer.writerow((file_name, offset, error, text))
+        self.rejects_file.flush()
+
+    def parse_chunks(self, parse, records):
+        """ Пачки разобранных строк в порядке файла. С пулом
+        держим в работе не больше двух пачек на процесс.
+        """
+        chunks = chunked(records, self.batch_size)
+        if self.pool is None:
+            yield from map(parse, chunks)
+            return
+        pending = deque()
+        window = self.workers * 2
+        for chunk in chunks:
+            pending.append(self.pool.submit(parse, chunk))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def check_relations(self, fields, values):
+        for column, field in fields:
+            if not field.is_relation:
+                continue
+            related = field.related_model
+            value = values[field.attname]
+            if value not in self.get_known_ids(related):
+                raise RowError(
+                    f'{related.__name__} с id={value} не существует'
+                )
+
+    def get_known_ids(self, model):
+        if model not in self.known_ids:
+            self.known_ids[model] = set(
+                model.objects.values_list('pk', flat=True)
+            )
+        return self.known_ids[model]
+
+    def write_chunk(self, model, objs, fields, resumed=False):
+        with transaction.atomic():
+            if resumed:
+                objs = self.skip_loaded(model, objs)
+            if self.on_conflict == 'ignore':
+                model.objects.bulk_create(objs, ignore_conflicts=True)
+            elif self.on_conflict == 'update':
+                self.upsert(model, objs, fields)
+            else:
+                model.objects.bulk_create(objs)
+            self.log_chunk(model, objs)
+        if model in self.known_ids:
+            # При ignore часть строк могла не записаться - берём из БД.
+            self.known_ids[model].update(
+                model.objects.filter(
+                    pk__in=[obj.pk for obj in objs]
+                ).values_list('pk', flat=True)
+            )
+
+    def skip_loaded(self, model, objs):
+        """ Строки пачки без уже записанных в БД. """
+        loaded = set(
+            model.objects.filter(
+                pk__in=[obj.pk for obj in objs]
+            ).values_list('pk', flat=True)
+        )
+        if loaded:
+            self.stderr.write(
+                f'{model.__name__}: {len(loaded)} строк уже загружены, '
+                'пропускаем'
+            )
+        return [obj for obj in objs if obj.pk not in loaded]
+
+    @staticmethod
+    def log_chunk(model, objs):
+        """ Журнал изменений в транзакции пачки: bulk_create
+        не вызывает сигналы.
+        """
+        if model is GenreTitle:
+            log_changes('title', {obj.title_id for obj in objs})
+        elif model._meta.model_name in TRACKED:
+            log_changes(model._meta.model_name, [obj.pk for obj in objs])
+
+    @classmethod
+    def upsert(cls, model, objs, fields):
+        """ Существующие строки обновляются только по колонкам
+        csv: остальные поля объектов заполнены значениями
+        по умолчанию и затёрли бы данные в БД.
+        """
+        existing = set(
+            model.objects.filter(
+                pk__in=[obj.pk for obj in objs]
+            ).values_list('pk', flat=True)
+        )
+        updated = [obj for obj in objs if obj.pk in existing]
+        names = [field.name for _, field in fields if not field.primary_key]
+        if updated and names:
+            if model is User:
+                cls.revoke_tokens(updated, names)
+            model.objects.bulk_update(updated, names)
+        model.objects.bulk_create(
+            [obj for obj in objs if obj.pk not in existing]
+        )
+
+    @staticmethod
+    def revoke_tokens(users, names):
+        """ bulk_update не вызывает сигналы: токены пользователей,
+        у которых меняются роль или права, отзываются здесь.
+        """
+        names = [name for name in AUTH_FIELDS if name in names]
+        if not names:
+            return
+        stored = {
+            pk: state for pk, *state in User.objects.filter(
+                pk__in=[user.pk for user in users]
+            ).values_list('pk', *names)
+        }
+        changed = [
+            user.pk for user in users
+            if [getattr(user, name) for name in names] != stored[user.pk]
+        ]
+        if changed:
+            User.objects.filter(pk__in=changed).update(
+                tokens_revoked_at=timezone.now()
+            )
+            for user_id in changed:
+                evict_auth_state(user_id)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from reviews.search import rebuild_index, search_enabled
+
+
+class Command(BaseCommand):
+    help = 'Перестроение полнотекстового индекса произведений и отзывов!'
+
+    def handle(self, *args, **options):
+        if not search_enabled():
+            raise CommandError('Полнотекстовый индекс есть только в SQLite!')
+        with transaction.atomic():
+            rebuild_index()
+        self.stdout.write('Поисковый индекс перестроен!')
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from reviews.aggregates import (
+    find_counter_drift, find_rating_drift, refresh_counters, refresh_ratings
+)
+from reviews.signals import data_changed
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт и проверка сохранённых рейтингов и счётчиков!'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить расхождения, ничего не изменяя',
+        )
+
+    def handle(self, *args, **options):
+        drift = list(find_rating_drift())
+        for title in drift:
+            self.stdout.write(
+                f'{title.pk} "{title}": сохранено '
+                f'{title.score_sum}/{title.reviews_count}, '
+                f'в отзывах {title.actual_sum}/{title.actual_count}'
+            )
+        counter_drift = list(find_counter_drift())
+        for row, field, stored, actual in counter_drift:
+            self.stdout.write(
+                f'{row._meta.verbose_name} {row.pk}: {field} '
+                f'сохранено {stored}, на самом деле {actual}'
+            )
+        if options['check']:
+            if drift or counter_drift:
+                raise CommandError(
+                    f'Расхождения в рейтингах: {len(drift)} произв., '
+                    f'в счётчиках: {len(counter_drift)}'
+                )
+            self.stdout.write('Рейтинги и счётчики совпадают с данными!')
+            return
+        with transaction.atomic():
+            updated = refresh_ratings()
+            refresh_counters()
+        data_changed.send(sender=self.__class__)
+        self.stdout.write(
+            f'Рейтинги пересчитаны: {updated} произв., '
+            f'исправлено счётчиков: {len(counter_drift)}'
+        )
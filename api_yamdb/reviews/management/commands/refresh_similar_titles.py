@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from api.v1.cache import bump
+from reviews.similarity import refresh_similar_titles
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт похожих произведений!'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Пересчитать все произведения, а не только изменённые',
+        )
+
+    def handle(self, *args, **options):
+        updated = refresh_similar_titles(
+            full=options['full'],
+            progress=self.stdout.write,
+        )
+        if updated:
+            # Соседи выводятся только в /titles/{id}/similar/.
+            bump('titles')
+        self.stdout.write(f'Похожие произведения пересчитаны: {updated}')
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+CREATE_SQL = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS reviews_search USING fts5('
+    'title_id UNINDEXED, name, body, tokenize = "trigram")',
+    'INSERT INTO reviews_search (rowid, title_id, name, body) '
+    'SELECT id * 2, id, name, COALESCE(description, \'\') '
+    'FROM reviews_title',
+    'INSERT INTO reviews_search (rowid, title_id, name, body) '
+    'SELECT id * 2 + 1, title_id, \'\', text FROM reviews_review',
+)
+DROP_SQL = 'DROP TABLE IF EXISTS reviews_search'
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 есть только в SQLite, на других СУБД поиск идёт через LIKE.
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in CREATE_SQL:
+            schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            create_search_index,
+            drop_search_index,
+        ),
+    ]
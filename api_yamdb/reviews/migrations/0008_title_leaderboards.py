@@ -0,0 +1,85 @@
+# Generated by Django 3.2 on 2026-10-18 11:31
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import (
+    Case, ExpressionWrapper, F, FloatField, OuterRef, Subquery, Value, When
+)
+from django.db.models.functions import Cast
+
+
+def fill_leaderboards(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    GenreTitle = apps.get_model('reviews', 'GenreTitle')
+    weight = settings.RATING_PRIOR_WEIGHT
+    Title.objects.update(weighted_rating=Case(
+        When(
+            reviews_count__gt=0,
+            then=ExpressionWrapper(
+                (Value(weight * settings.RATING_PRIOR_MEAN)
+                 + Cast(F('score_sum'), FloatField()))
+                / (Value(weight) + F('reviews_count')),
+                output_field=FloatField(),
+            ),
+        ),
+        default=Value(None),
+        output_field=FloatField(),
+    ))
+    title = Title.objects.filter(pk=OuterRef('title_id'))
+    GenreTitle.objects.update(
+        weighted_rating=Subquery(title.values('weighted_rating')[:1]),
+        reviews_count=Subquery(title.values('reviews_count')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='genretitle',
+            name='reviews_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Количество отзывов произведения'),
+        ),
+        migrations.AddField(
+            model_name='genretitle',
+            name='weighted_rating',
+            field=models.FloatField(editable=False, null=True, verbose_name='Взвешенный рейтинг произведения'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='weighted_rating',
+            field=models.FloatField(editable=False, null=True, verbose_name='Взвешенный рейтинг'),
+        ),
+        migrations.AddIndex(
+            model_name='genretitle',
+            index=models.Index(fields=['genre', '-weighted_rating'], name='genretitle_genre_weighted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='genretitle',
+            index=models.Index(fields=['genre', '-reviews_count'], name='genretitle_genre_reviews_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['-weighted_rating'], name='title_weighted_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', '-weighted_rating'], name='title_category_weighted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['-reviews_count'], name='title_reviews_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', '-reviews_count'], name='title_category_reviews_idx'),
+        ),
+        migrations.RunPython(
+            fill_leaderboards,
+            migrations.RunPython.noop,
+        ),
+    ]
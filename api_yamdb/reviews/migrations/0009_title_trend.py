@@ -0,0 +1,29 @@
+# Generated by Django 3.2 on 2026-10-18 11:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_title_leaderboards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleTrend',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trend', serialize=False, to='reviews.title', verbose_name='Произведение')),
+                ('log_score', models.FloatField(verbose_name='Логарифм популярности')),
+            ],
+            options={
+                'verbose_name': 'Популярность произведения',
+                'verbose_name_plural': 'Популярность произведений',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='titletrend',
+            index=models.Index(fields=['-log_score'], name='titletrend_log_score_idx'),
+        ),
+    ]
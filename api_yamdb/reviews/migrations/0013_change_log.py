@@ -0,0 +1,62 @@
+# Generated by Django 3.2 on 2026-10-18 11:41
+
+from django.db import migrations, models
+
+# Существующие записи попадают в журнал, чтобы синхронизацию можно
+# было начать с since=0.
+SEED = (
+    ('reviews', 'Category'),
+    ('reviews', 'Genre'),
+    ('reviews', 'Title'),
+    ('reviews', 'Review'),
+    ('reviews', 'Comment'),
+    ('users', 'User'),
+)
+
+
+def seed_change_log(apps, schema_editor):
+    Change = apps.get_model('reviews', 'Change')
+    for app_label, model_name in SEED:
+        model = apps.get_model(app_label, model_name)
+        Change.objects.bulk_create(
+            (
+                Change(model=model._meta.model_name, object_id=pk,
+                       action='save')
+                for pk in model.objects.order_by('pk')
+                .values_list('pk', flat=True).iterator()
+            ),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0012_review_comments_count'),
+        ('users', '0004_user_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=16, verbose_name='Модель')),
+                ('object_id', models.BigIntegerField(verbose_name='id записи')),
+                ('action', models.CharField(choices=[('save', 'создание или изменение'), ('delete', 'удаление')], max_length=6, verbose_name='Действие')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Время изменения')),
+            ],
+            options={
+                'verbose_name': 'Изменение',
+                'verbose_name_plural': 'Журнал изменений',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(fields=['model', 'id'], name='change_model_id_idx'),
+        ),
+        migrations.RunPython(
+            seed_change_log,
+            migrations.RunPython.noop,
+        ),
+    ]
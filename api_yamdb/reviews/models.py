@@ -3,7 +3,7 @@ from datetime import datetime as dt
 from django.core.validators import (
     MaxValueValidator, MinValueValidator, RegexValidator
 )
-from django.db import models
+from django.db import models, transaction
 
 from users.models import User
 from api_yamdb.settings import (
@@ -11,7 +11,27 @@ from api_yamdb.settings import (
 )
 
 
-class Category(models.Model):
+SAVE = 'save'
+DELETE = 'delete'
+
+CHANGE_ACTIONS = (
+    (SAVE, 'создание или изменение'),
+    (DELETE, 'удаление'),
+)
+
+
+class AtomicSaveMixin:
+    """ Сохранение вместе с сигналами post_save (журнал изменений,
+    счётчики) в одной транзакции. Удаление и так выполняется
+    в транзакции вместе с сигналами.
+    """
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class Category(AtomicSaveMixin, models.Model):
     name = models.CharField(
         max_length=NAME_MAX_LENGTH,
         verbose_name='Название',
@@ -37,7 +57,7 @@ class Category(models.Model):
         return self.name
 
 
-class Genre(models.Model):
+class Genre(AtomicSaveMixin, models.Model):
     name = models.CharField(
         max_length=NAME_MAX_LENGTH,
         verbose_name='Название',
@@ -63,7 +83,7 @@ class Genre(models.Model):
         return self.name
 
 
-class Title(models.Model):
+class Title(AtomicSaveMixin, models.Model):
     name = models.CharField(
         max_length=NAME_MAX_LENGTH,
         verbose_name='Название',
@@ -96,17 +116,126 @@ class Title(models.Model):
         null=True,
         verbose_name='Категория',
     )
+    score_sum = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сумма оценок',
+    )
+    reviews_count = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество отзывов',
+    )
+    rating = models.FloatField(
+        null=True,
+        editable=False,
+        verbose_name='Рейтинг',
+    )
+    weighted_rating = models.FloatField(
+        null=True,
+        editable=False,
+        verbose_name='Взвешенный рейтинг',
+    )
+    # Гистограмма оценок: количество отзывов с оценкой 1..10.
+    score_1 = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 1',
+    )
+    score_2 = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 2',
+    )
+    score_3 = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 3',
+    )
+    score_4 = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 4',
+    )
+    score_5 = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 5',
+    )
+    score_6 = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 6',
+    )
+    score_7 = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 7',
+    )
+    score_8 = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 8',
+    )
+    score_9 = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 9',
+    )
+    score_10 = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 10',
+    )
+    # Оценки или жанры изменились после расчёта похожих произведений.
+    similar_stale = models.BooleanField(
+        default=True,
+        db_index=True,
+        editable=False,
+        verbose_name='Похожие произведения устарели',
+    )
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
         ordering = ('name',)
+        indexes = (
+            # Рейтинги произведений (/titles/top/).
+            models.Index(
+                fields=('-weighted_rating',),
+                name='title_weighted_rating_idx',
+            ),
+            models.Index(
+                fields=('category', '-weighted_rating'),
+                name='title_category_weighted_idx',
+            ),
+            models.Index(
+                fields=('-reviews_count',),
+                name='title_reviews_count_idx',
+            ),
+            models.Index(
+                fields=('category', '-reviews_count'),
+                name='title_category_reviews_idx',
+            ),
+            models.Index(
+                fields=('name',),
+                name='title_name_idx',
+            ),
+            models.Index(
+                fields=('year', 'name'),
+                name='title_year_name_idx',
+            ),
+            models.Index(
+                fields=('category', 'name'),
+                name='title_category_name_idx',
+            ),
+        )
 
     def __str__(self):
         return self.name
 
 
-class GenreTitle(models.Model):
+class GenreTitle(AtomicSaveMixin, models.Model):
     title = models.ForeignKey(
         Title,
         on_delete=models.CASCADE,
@@ -117,16 +246,42 @@ class GenreTitle(models.Model):
         on_delete=models.CASCADE,
         verbose_name='Жанр',
     )
+    # Копии рейтинга произведения для рейтингов по жанру: выборка
+    # идёт по индексу жанра без сортировки всех его произведений.
+    weighted_rating = models.FloatField(
+        null=True,
+        editable=False,
+        verbose_name='Взвешенный рейтинг произведения',
+    )
+    reviews_count = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество отзывов произведения',
+    )
 
     class Meta:
         verbose_name = 'Произведение и жанр'
         verbose_name_plural = 'Произведения и жанры'
+        indexes = (
+            models.Index(
+                fields=('genre', 'title'),
+                name='genretitle_genre_title_idx',
+            ),
+            models.Index(
+                fields=('genre', '-weighted_rating'),
+                name='genretitle_genre_weighted_idx',
+            ),
+            models.Index(
+                fields=('genre', '-reviews_count'),
+                name='genretitle_genre_reviews_idx',
+            ),
+        )
 
     def __str__(self):
         return f'{self.title}, жанр - {self.genre}'
 
 
-class Review(models.Model):
+class Review(AtomicSaveMixin, models.Model):
     title = models.ForeignKey(
         Title,
         on_delete=models.CASCADE,
@@ -155,6 +310,11 @@ class Review(models.Model):
         db_index=True,
         verbose_name='Дата публикации отзыва',
     )
+    comments_count = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев',
+    )
 
     class Meta:
         verbose_name = 'Отзыв'
@@ -165,13 +325,19 @@ class Review(models.Model):
                 name='unique review'
             ),
         )
-        ordering = ('pub_date',)
+        ordering = ('pub_date', 'id')
+        indexes = (
+            models.Index(
+                fields=('title', 'pub_date'),
+                name='review_title_pub_date_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text
 
 
-class Comment(models.Model):
+class Comment(AtomicSaveMixin, models.Model):
     review = models.ForeignKey(
         Review,
         on_delete=models.CASCADE,
@@ -197,6 +363,119 @@ class Comment(models.Model):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        ordering = ('pub_date', 'id')
+        indexes = (
+            models.Index(
+                fields=('review', 'pub_date'),
+                name='comment_review_pub_date_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text
+
+
+class TitleTrend(models.Model):
+    """ Популярность произведения за последнее время: сумма весов
+    отзывов и комментариев, каждый из которых затухает вдвое за
+    TRENDING_HALF_LIFE. Хранится логарифм суммы, приведённой к началу
+    эпохи, - со временем он не меняется, затухание считается при
+    чтении, а порядок произведений от момента чтения не зависит.
+    """
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trend',
+        verbose_name='Произведение',
+    )
+    log_score = models.FloatField(
+        verbose_name='Логарифм популярности',
+    )
+
+    class Meta:
+        verbose_name = 'Популярность произведения'
+        verbose_name_plural = 'Популярность произведений'
+        indexes = (
+            models.Index(
+                fields=('-log_score',),
+                name='titletrend_log_score_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.title}: {self.log_score}'
+
+
+class SimilarTitle(models.Model):
+    """ Ближайшие соседи произведения по оценкам пользователей
+    и общим жанрам, rank 0 - самое похожее. Рассчитывается
+    manage.py refresh_similar_titles.
+    """
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='similar_links',
+        verbose_name='Произведение',
+    )
+    similar = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Похожее произведение',
+    )
+    rank = models.PositiveSmallIntegerField(
+        verbose_name='Место',
+    )
+    score = models.FloatField(
+        verbose_name='Сходство',
+    )
+
+    class Meta:
+        verbose_name = 'Похожее произведение'
+        verbose_name_plural = 'Похожие произведения'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('title', 'rank'),
+                name='unique similar rank',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.title} ~ {self.similar}: {self.score}'
+
+
+class Change(models.Model):
+    """ Журнал изменений для инкрементальной синхронизации
+    (/api/v1/changes/): только добавление, id - курсор. Пишется
+    сигналами в транзакции сохранения или удаления записи.
+    """
+    model = models.CharField(
+        max_length=16,
+        verbose_name='Модель',
+    )
+    object_id = models.BigIntegerField(
+        verbose_name='id записи',
+    )
+    action = models.CharField(
+        max_length=6,
+        choices=CHANGE_ACTIONS,
+        verbose_name='Действие',
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Время изменения',
+    )
+
+    class Meta:
+        verbose_name = 'Изменение'
+        verbose_name_plural = 'Журнал изменений'
+        indexes = (
+            models.Index(
+                fields=('model', 'id'),
+                name='change_model_id_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.id}: {self.action} {self.model} {self.object_id}'
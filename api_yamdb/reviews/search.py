@@ -0,0 +1,136 @@
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# Полнотекстовый индекс произведений и отзывов - таблица SQLite FTS5
+# с триграммным токенизатором: ищет подстроки без учёта регистра,
+# в том числе в русском тексте. rowid кодирует вид и id записи, чтобы
+# обновлять и удалять строки индекса по первичному ключу.
+# На других СУБД поиск откатывается к icontains.
+SEARCH_TABLE = 'reviews_search'
+TITLE, REVIEW = 'title', 'review'
+KINDS = (TITLE, REVIEW)
+# Триграммный токенизатор не находит слова короче трёх символов.
+MIN_WORD_LENGTH = 3
+
+REBUILD_SQL = (
+    f'DELETE FROM {SEARCH_TABLE}',
+    f'INSERT INTO {SEARCH_TABLE} (rowid, title_id, name, body) '
+    'SELECT id * 2, id, name, COALESCE(description, \'\') '
+    'FROM reviews_title',
+    f'INSERT INTO {SEARCH_TABLE} (rowid, title_id, name, body) '
+    'SELECT id * 2 + 1, title_id, \'\', text FROM reviews_review',
+)
+
+
+def search_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def rebuild_index():
+    if not search_enabled():
+        return
+    with connection.cursor() as cursor:
+        for sql in REBUILD_SQL:
+            cursor.execute(sql)
+
+
+def _rowid(kind, pk):
+    return int(pk) * 2 + KINDS.index(kind)
+
+
+def _upsert(kind, pk, title_id, name, body):
+    if not search_enabled():
+        return
+    rowid = _rowid(kind, pk)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', (rowid,)
+        )
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, title_id, name, body) '
+            'VALUES (%s, %s, %s, %s)',
+            (rowid, title_id, name, body or ''),
+        )
+
+
+def index_title(title):
+    _upsert(TITLE, title.pk, title.pk, title.name, title.description)
+
+
+def index_review(review):
+    _upsert(REVIEW, review.pk, review.title_id, '', review.text)
+
+
+def unindex(kind, pk):
+    if not search_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s',
+            (_rowid(kind, pk),),
+        )
+
+
+def build_match(query):
+    """ Запрос пользователя -> выражение MATCH: каждое слово
+    в кавычках, все слова обязательны. None - искать нечем.
+    """
+    words = [
+        word for word in query.split()
+        if len(word) >= MIN_WORD_LENGTH
+    ]
+    if not words:
+        return None
+    return ' '.join(
+        '"{}"'.format(word.replace('"', '""')) for word in words
+    )
+
+
+def filter_titles(queryset, query):
+    """ Фильтр произведений по названию и описанию. """
+    match = build_match(query) if search_enabled() else None
+    if match is None:
+        return queryset.filter(
+            Q(name__icontains=query) | Q(description__icontains=query)
+        )
+    return queryset.filter(
+        pk__in=RawSQL(
+            f'SELECT rowid / 2 FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s AND rowid %% 2 = 0',
+            (match,),
+        )
+    )
+
+
+def search(query, kinds=KINDS, limit=100):
+    """ Найденные записи в порядке релевантности (bm25, совпадение
+    в названии весит больше, чем в тексте). Возвращает словари
+    type, id, title_id, snippet, rank (меньше - релевантнее).
+    """
+    match = build_match(query)
+    if not search_enabled() or match is None:
+        return []
+    parities = tuple(KINDS.index(kind) for kind in kinds)
+    placeholders = ', '.join(['%s'] * len(parities))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid, title_id, '
+            f'snippet({SEARCH_TABLE}, -1, \'[\', \']\', \'…\', 64), '
+            f'bm25({SEARCH_TABLE}, 0, 10.0, 1.0) AS score '
+            f'FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s '
+            f'AND rowid %% 2 IN ({placeholders}) '
+            f'ORDER BY score LIMIT %s',
+            (match, *parities, limit),
+        )
+        return [
+            {
+                'type': KINDS[rowid % 2],
+                'id': rowid // 2,
+                'title_id': title_id,
+                'snippet': snippet,
+                'rank': rank,
+            }
+            for rowid, title_id, snippet, rank in cursor.fetchall()
+        ]
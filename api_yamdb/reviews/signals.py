@@ -0,0 +1,255 @@
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_init, post_save, pre_delete
+)
+from django.dispatch import Signal, receiver
+
+from users.models import User
+from .aggregates import (
+    refresh_ratings, shift_comment_count, shift_rating, shift_review_count,
+    sync_genre_ranks
+)
+from .changes import log_change, log_changes
+from .lookups import category_slugs, genre_slugs
+from .models import (
+    DELETE, Category, Comment, Genre, GenreTitle, Review, Title
+)
+from .search import REVIEW, TITLE, index_review, index_title, unindex
+from .trending import (
+    add_trend, comment_weight, rebuild_trends, remove_trend, review_weight
+)
+
+# Массовые изменения в обход сигналов моделей (bulk_create, update).
+data_changed = Signal()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def evict_category_slugs(sender, **kwargs):
+    # После COMMIT: иначе кэш перечитает ещё старые слаги.
+    transaction.on_commit(category_slugs.evict)
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def evict_genre_slugs(sender, **kwargs):
+    transaction.on_commit(genre_slugs.evict)
+
+
+@receiver(data_changed)
+def evict_all_slugs(sender, **kwargs):
+    transaction.on_commit(category_slugs.evict)
+    transaction.on_commit(genre_slugs.evict)
+
+
+@receiver(post_save, sender=Title)
+def index_title_on_save(sender, instance, raw, **kwargs):
+    if not raw:
+        index_title(instance)
+
+
+@receiver(post_delete, sender=Title)
+def unindex_title_on_delete(sender, instance, **kwargs):
+    unindex(TITLE, instance.pk)
+
+
+@receiver(post_save, sender=Review)
+def index_review_on_save(sender, instance, raw, **kwargs):
+    if not raw:
+        index_review(instance)
+
+
+@receiver(post_delete, sender=Review)
+def unindex_review_on_delete(sender, instance, **kwargs):
+    unindex(REVIEW, instance.pk)
+
+
+@receiver(post_save, sender=GenreTitle)
+def copy_rank_on_genre_link(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        sync_genre_ranks((instance.title_id,))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def copy_rank_on_genre_add(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    """ title.genre.add() создаёт связи в обход post_save. """
+    if action != 'post_add':
+        return
+    sync_genre_ranks(pk_set if reverse else (instance.pk,))
+
+
+def mark_similar_stale(title_ids):
+    Title.objects.filter(pk__in=title_ids).update(similar_stale=True)
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+def mark_similar_on_genre_link(sender, instance, raw=False, **kwargs):
+    if not raw:
+        mark_similar_stale((instance.title_id,))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def mark_similar_on_genre_change(sender, instance, action, reverse, pk_set,
+                                 **kwargs):
+    if action in ('post_add', 'post_remove'):
+        mark_similar_stale(pk_set if reverse else (instance.pk,))
+    elif action == 'post_clear' and not reverse:
+        mark_similar_stale((instance.pk,))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=User)
+def log_save(sender, instance, **kwargs):
+    log_change(instance)
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=User)
+def log_delete(sender, instance, **kwargs):
+    log_change(instance, DELETE)
+
+
+@receiver(pre_delete, sender=Category)
+def log_category_titles(sender, instance, **kwargs):
+    """ Категорию у произведений обнулит UPDATE (SET_NULL) без
+    сигналов Title - записываем их в журнал в транзакции удаления.
+    """
+    log_changes('title', list(
+        Title.objects.filter(category=instance).values_list('pk', flat=True)
+    ))
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+def log_genre_link(sender, instance, **kwargs):
+    # Жанры выводятся в данных произведения.
+    log_changes('title', (instance.title_id,))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def log_genre_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove') and pk_set:
+        log_changes('title', pk_set if reverse else (instance.pk,))
+    elif action == 'post_clear' and not reverse:
+        log_changes('title', (instance.pk,))
+
+
+@receiver(post_init, sender=Review)
+def remember_review_score(sender, instance, **kwargs):
+    """ Запоминаем загруженные произведение и оценку,
+    чтобы при сохранении сдвинуть рейтинг на разницу.
+    """
+    instance._rating_state = (
+        instance.__dict__.get('title_id'),
+        instance.__dict__.get('score'),
+    )
+
+
+@receiver(post_save, sender=Review)
+def update_trend_on_save(sender, instance, created, raw, **kwargs):
+    """ Подключён раньше update_rating_on_save: тот обновляет
+    запомненное состояние отзыва.
+    """
+    if raw:
+        return
+    old_title_id, old_score = instance._rating_state
+    title_id, score = instance.title_id, int(instance.score)
+    if created:
+        add_trend(title_id, review_weight(score), instance.pub_date)
+    elif old_score is None:
+        rebuild_trends((title_id,))
+    elif (str(old_title_id), int(old_score)) != (str(title_id), score):
+        remove_trend(
+            old_title_id, review_weight(old_score), instance.pub_date
+        )
+        add_trend(title_id, review_weight(score), instance.pub_date)
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    old_title_id, old_score = instance._rating_state
+    title_id, score = instance.title_id, int(instance.score)
+    if created:
+        shift_rating(title_id, new_score=score)
+    elif old_score is None:
+        # Оценка не была загружена из БД - разницу не узнать.
+        refresh_ratings((title_id,))
+    elif str(old_title_id) != str(title_id):
+        shift_rating(old_title_id, old_score=old_score)
+        shift_rating(title_id, new_score=score)
+    elif int(old_score) != score:
+        shift_rating(title_id, old_score, score)
+    instance._rating_state = (title_id, score)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    shift_rating(instance.title_id, old_score=instance.score)
+
+
+@receiver(post_save, sender=Review)
+def count_review_on_save(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        shift_review_count(instance.author_id, 1)
+
+
+@receiver(post_delete, sender=Review)
+def count_review_on_delete(sender, instance, **kwargs):
+    shift_review_count(instance.author_id, -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment_on_save(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        shift_comment_count(instance.review_id, instance.author_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_comment_on_delete(sender, instance, **kwargs):
+    shift_comment_count(instance.review_id, instance.author_id, -1)
+
+
+@receiver(post_delete, sender=Review)
+def update_trend_on_delete(sender, instance, **kwargs):
+    remove_trend(
+        instance.title_id,
+        review_weight(instance.score),
+        instance.pub_date,
+    )
+
+
+def comment_title_id(comment):
+    if 'review' in comment._state.fields_cache:
+        return comment.review.title_id
+    return (
+        Review.objects.filter(pk=comment.review_id)
+        .values_list('title_id', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Comment)
+def update_trend_on_comment(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        add_trend(
+            comment_title_id(instance), comment_weight(), instance.pub_date
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def update_trend_on_comment_delete(sender, instance, **kwargs):
+    # При удалении отзыва его комментарии удаляются раньше него.
+    title_id = comment_title_id(instance)
+    if title_id is not None:
+        remove_trend(title_id, comment_weight(), instance.pub_date)
@@ -0,0 +1,176 @@
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from scipy import sparse
+
+from .models import GenreTitle, Review, SimilarTitle, Title
+
+# Сходство произведений - косинус между столбцами матрицы
+# пользователь x произведение с оценками из отзывов, смешанный
+# с косинусом между наборами жанров с весом SIMILAR_GENRE_WEIGHT.
+# Матрица сходства не строится целиком: строки считаются блоками,
+# в плотном блоке не больше SIMILAR_BLOCK_CELLS ячеек.
+
+
+def read_rows(queryset, fields, chunk_size):
+    """ Столбцы fields таблицы в массивах numpy. Строки читаются
+    порциями по первичному ключу, в памяти - только массивы.
+    """
+    columns = [[] for _ in fields]
+    last_pk = 0
+    while True:
+        rows = list(
+            queryset.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', *fields)[:chunk_size]
+        )
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        chunk = np.array(rows, dtype=np.int64)
+        for column, values in zip(columns, chunk[:, 1:].T):
+            column.append(values)
+    return [
+        np.concatenate(column) if column else np.empty(0, dtype=np.int64)
+        for column in columns
+    ]
+
+
+def title_index(title_ids, titles):
+    """ Номера строк произведений titles в отсортированном title_ids
+    и маска найденных: произведение могли создать во время расчёта.
+    """
+    if not len(title_ids):
+        return titles[:0], np.zeros(len(titles), dtype=bool)
+    index = np.searchsorted(title_ids, titles)
+    index = np.minimum(index, len(title_ids) - 1)
+    return index, title_ids[index] == titles
+
+
+def normalized_rows(title_ids, titles, column_ids, values):
+    """ Разреженная матрица (CSR) произведение x признак
+    с единичными нормами строк.
+    """
+    row_index, found = title_index(title_ids, titles)
+    row_index, column_ids = row_index[found], column_ids[found]
+    values = values[found]
+    columns = np.unique(column_ids, return_inverse=True)[1]
+    matrix = sparse.csr_matrix(
+        (values.astype(np.float64), (row_index, columns)),
+        shape=(
+            len(title_ids), int(columns.max()) + 1 if len(columns) else 0
+        ),
+    )
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)))
+    norms[norms == 0] = 1
+    return sparse.csr_matrix(matrix.multiply(1 / norms))
+
+
+def build_matrices(chunk_size):
+    """ id произведений и две матрицы произведение x признак:
+    оценки пользователей и жанры.
+    """
+    title_ids = np.array(
+        Title.objects.order_by('pk').values_list('pk', flat=True),
+        dtype=np.int64,
+    )
+    authors, titles, scores = read_rows(
+        Review.objects.all(), ('author_id', 'title_id', 'score'),
+        chunk_size,
+    )
+    ratings = normalized_rows(title_ids, titles, authors, scores)
+    titles, genres = read_rows(
+        GenreTitle.objects.all(), ('title_id', 'genre_id'), chunk_size
+    )
+    genres = normalized_rows(
+        title_ids, titles, genres, np.ones(len(genres))
+    )
+    return title_ids, ratings, genres
+
+
+def top_neighbours(rows, ratings, genres, count):
+    """ Для строк rows - индексы и сходство count самых
+    похожих произведений по убыванию сходства.
+    """
+    weight = settings.SIMILAR_GENRE_WEIGHT
+    scores = (1 - weight) * (ratings[rows] @ ratings.T).toarray()
+    scores += weight * (genres[rows] @ genres.T).toarray()
+    scores[np.arange(len(rows)), rows] = 0
+    count = min(count, scores.shape[1])
+    best = np.argpartition(-scores, count - 1, axis=1)[:, :count]
+    best_scores = np.take_along_axis(scores, best, axis=1)
+    order = np.argsort(-best_scores, axis=1, kind='stable')
+    return (
+        np.take_along_axis(best, order, axis=1),
+        np.take_along_axis(best_scores, order, axis=1),
+    )
+
+
+def save_neighbours(title_ids, rows, best, best_scores):
+    links = []
+    for row, indexes, scores in zip(rows, best, best_scores):
+        # Без общих оценщиков и жанров сходство нулевое - не соседи.
+        indexes = indexes[scores > 0]
+        links.extend(
+            SimilarTitle(
+                title_id=int(title_ids[row]),
+                similar_id=int(title_ids[index]),
+                rank=rank,
+                score=float(score),
+            )
+            for rank, (index, score) in enumerate(
+                zip(indexes, scores[scores > 0])
+            )
+        )
+    with transaction.atomic():
+        SimilarTitle.objects.filter(title_id__in=title_ids[rows]).delete()
+        SimilarTitle.objects.bulk_create(links)
+    return len(links)
+
+
+def refresh_similar_titles(full=False, progress=lambda message: None):
+    """ Пересчитывает соседей устаревших произведений (full - всех).
+    Метка снимается до чтения отзывов: изменения во время расчёта
+    попадут в следующий запуск. Возвращает число пересчитанных
+    произведений.
+    """
+    stale = Title.objects.all() if full else Title.objects.filter(
+        similar_stale=True
+    )
+    stale_ids = list(stale.values_list('pk', flat=True))
+    if not stale_ids:
+        return 0
+    Title.objects.filter(pk__in=stale_ids).update(similar_stale=False)
+    title_ids, ratings, genres = build_matrices(
+        settings.SIMILAR_READ_CHUNK
+    )
+    rows, found = title_index(title_ids, np.array(sorted(stale_ids)))
+    rows = rows[found]
+    if not len(rows):
+        return 0
+    block_size = max(1, settings.SIMILAR_BLOCK_CELLS // len(title_ids))
+    for start in range(0, len(rows), block_size):
+        block = rows[start:start + block_size]
+        best, best_scores = top_neighbours(
+            block, ratings, genres, settings.SIMILAR_TITLES_COUNT
+        )
+        save_neighbours(title_ids, block, best, best_scores)
+        progress(f'Произведений: {start + len(block)} из {len(rows)}')
+    return len(rows)
+
+
+def similar_titles(title_id, limit):
+    """ Соседи произведения из таблицы SimilarTitle по индексу
+    (title, rank), у каждого - атрибут similarity.
+    """
+    links = (
+        SimilarTitle.objects.filter(title_id=title_id, rank__lt=limit)
+        .select_related('similar__category')
+        .prefetch_related('similar__genre')
+        .order_by('rank')
+    )
+    result = []
+    for link in links:
+        link.similar.similarity = link.score
+        result.append(link.similar)
+    return result
@@ -0,0 +1,184 @@
+from datetime import timedelta
+from math import exp, log, log1p
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Comment, Review, Title, TitleTrend
+
+# Вклад веса w, опубликованного в момент t (сек. от начала эпохи),
+# в сохранённую сумму - w * 2 ** (t / half_life). В таблице лежит
+# логарифм суммы: сами степени не помещаются во float.
+# Вклады меньше этой доли суммы считаем ошибкой округления.
+NEGLIGIBLE = 1e-9
+
+
+def decay_rate():
+    """ Скорость затухания на секунду в логарифмической шкале. """
+    return log(2) / (settings.TRENDING_HALF_LIFE * 3600)
+
+
+def log_term(weight, moment):
+    return log(weight) + moment.timestamp() * decay_rate()
+
+
+def review_weight(score):
+    return settings.TRENDING_REVIEW_WEIGHT * int(score) / 10
+
+
+def comment_weight():
+    return settings.TRENDING_COMMENT_WEIGHT
+
+
+def log_add(a, b):
+    if a < b:
+        a, b = b, a
+    return a + log1p(exp(b - a))
+
+
+def log_sub(a, b):
+    """ log(e ** a - e ** b), None - от суммы ничего не осталось. """
+    if b - a > -NEGLIGIBLE:
+        return None
+    return a + log1p(-exp(b - a))
+
+
+def add_trend(title_id, weight, moment):
+    """ Добавляет к популярности произведения вклад веса, опубликованного
+    в момент moment. Прежние вклады не перечитываются.
+    """
+    term = log_term(weight, moment)
+    with transaction.atomic():
+        trend, created = TitleTrend.objects.get_or_create(
+            title_id=title_id,
+            defaults={'log_score': term},
+        )
+        if created:
+            return
+        trend = TitleTrend.objects.select_for_update().get(pk=title_id)
+        trend.log_score = log_add(trend.log_score, term)
+        trend.save(update_fields=('log_score',))
+
+
+def remove_trend(title_id, weight, moment):
+    """ Вычитает вклад удалённого или изменённого отзыва
+    или комментария. Строку без остатка удаляет.
+    """
+    term = log_term(weight, moment)
+    with transaction.atomic():
+        trend = (
+            TitleTrend.objects.select_for_update()
+            .filter(pk=title_id).first()
+        )
+        if trend is None:
+            return
+        log_score = log_sub(trend.log_score, term)
+        if log_score is None:
+            trend.delete()
+        else:
+            trend.log_score = log_score
+            trend.save(update_fields=('log_score',))
+
+
+def current_score(log_score, now=None):
+    """ Популярность на момент now. """
+    now = now or timezone.now()
+    return exp(log_score - now.timestamp() * decay_rate())
+
+
+def min_log_score(now=None):
+    """ Порог сохранённого логарифма: ниже него популярность на момент
+    now меньше TRENDING_MIN_SCORE.
+    """
+    now = now or timezone.now()
+    return log(settings.TRENDING_MIN_SCORE) + now.timestamp() * decay_rate()
+
+
+def horizon(now=None):
+    """ Отзывы и комментарии старше этого момента уже не поднимают
+    популярность произведения выше TRENDING_MIN_SCORE.
+    """
+    now = now or timezone.now()
+    heaviest = max(review_weight(10), comment_weight())
+    half_lives = log(heaviest / settings.TRENDING_MIN_SCORE) / log(2)
+    return now - timedelta(
+        hours=settings.TRENDING_HALF_LIFE * max(half_lives, 0)
+    )
+
+
+def compact_trends(now=None):
+    """ Удаляет строки, популярность которых опустилась ниже
+    TRENDING_MIN_SCORE. Возвращает число удалённых строк.
+    """
+    deleted, _ = TitleTrend.objects.filter(
+        log_score__lt=min_log_score(now)
+    ).delete()
+    return deleted
+
+
+def _accumulate(scores, title_id, term):
+    previous = scores.get(title_id)
+    scores[title_id] = term if previous is None else log_add(previous, term)
+
+
+def rebuild_trends(title_ids=None, now=None):
+    """ Полный пересчёт по отзывам и комментариям не старше horizon():
+    после массовой загрузки в обход сигналов и смены весов или периода
+    полураспада. Возвращает число сохранённых строк.
+    """
+    since = horizon(now)
+    reviews = Review.objects.filter(pub_date__gte=since)
+    comments = Comment.objects.filter(pub_date__gte=since)
+    trends = TitleTrend.objects.all()
+    if title_ids is not None:
+        reviews = reviews.filter(title_id__in=title_ids)
+        comments = comments.filter(review__title_id__in=title_ids)
+        trends = trends.filter(title_id__in=title_ids)
+    scores = {}
+    for title_id, score, pub_date in (
+        reviews.order_by().values_list('title_id', 'score', 'pub_date')
+        .iterator()
+    ):
+        term = log_term(review_weight(score), pub_date)
+        _accumulate(scores, title_id, term)
+    weight = comment_weight()
+    for title_id, pub_date in (
+        comments.order_by().values_list('review__title_id', 'pub_date')
+        .iterator()
+    ):
+        _accumulate(scores, title_id, log_term(weight, pub_date))
+    threshold = min_log_score(now)
+    rows = [
+        TitleTrend(title_id=title_id, log_score=log_score)
+        for title_id, log_score in scores.items()
+        if log_score >= threshold
+    ]
+    with transaction.atomic():
+        trends.delete()
+        TitleTrend.objects.bulk_create(rows)
+    return len(rows)
+
+
+def trending_titles(limit=10, now=None):
+    """ Самые популярные сейчас произведения по индексу log_score:
+    читается limit строк, у каждого произведения - атрибут trending.
+    """
+    now = now or timezone.now()
+    rows = list(
+        TitleTrend.objects.filter(log_score__gte=min_log_score(now))
+        .order_by('-log_score')
+        .values_list('title_id', 'log_score')[:limit]
+    )
+    titles = (
+        Title.objects.select_related('category')
+        .prefetch_related('genre')
+        .in_bulk([title_id for title_id, _ in rows])
+    )
+    result = []
+    for title_id, log_score in rows:
+        if title_id in titles:
+            title = titles[title_id]
+            title.trending = current_score(log_score, now)
+            result.append(title)
+    return result
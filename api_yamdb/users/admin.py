@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import User
+from .models import OutboxMail, User
 
 
 class UserAdmin(admin.ModelAdmin):
@@ -21,4 +21,20 @@ class UserAdmin(admin.ModelAdmin):
     search_fields = ('username', 'role')
 
 
+class OutboxMailAdmin(admin.ModelAdmin):
+
+    list_display = (
+        'id',
+        'recipient',
+        'subject',
+        'status',
+        'attempts',
+        'next_attempt_at',
+        'sent_at',
+    )
+    list_filter = ('status',)
+    search_fields = ('recipient',)
+
+
 admin.site.register(User)
+admin.site.register(OutboxMail, OutboxMailAdmin)
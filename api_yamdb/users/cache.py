@@ -0,0 +1,43 @@
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import User
+
+AUTH_STATE_KEY = 'users:auth:{}'
+
+
+def get_auth_state(user_id):
+    """ Активность пользователя и время отзыва его токенов.
+    Читается из кэша, при промахе - одним запросом из БД.
+    None - пользователя нет.
+    """
+    key = AUTH_STATE_KEY.format(user_id)
+    state = cache.get(key)
+    if state is None:
+        row = (
+            User.objects.filter(pk=user_id)
+            .values('is_active', 'tokens_revoked_at')
+            .first()
+        )
+        if row is None:
+            return None
+        revoked_at = row['tokens_revoked_at']
+        state = {
+            'is_active': row['is_active'],
+            'revoked_at': revoked_at.timestamp() if revoked_at else None,
+        }
+        cache.set(key, state, settings.USER_CACHE_TIMEOUT)
+    return state
+
+
+def evict_auth_state(user_id):
+    """ Удаляет состояние после фиксации транзакции (вне транзакции -
+    сразу): до COMMIT get_auth_state прочитал бы из БД и закэшировал
+    ещё прежнее состояние.
+    """
+    transaction.on_commit(
+        partial(cache.delete, AUTH_STATE_KEY.format(user_id))
+    )
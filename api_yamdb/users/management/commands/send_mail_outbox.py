@@ -0,0 +1,42 @@
+from time import sleep
+
+from django.core.management.base import BaseCommand
+
+from users.outbox import send_batch
+
+
+class Command(BaseCommand):
+    help = 'Отправка писем из очереди исходящей почты!'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Писем за одно соединение с почтовым сервером',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Работать постоянно, опрашивая очередь',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза между опросами пустой очереди, сек.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_batch(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(
+                    f'Отправлено писем: {sent}, ошибок: {failed}'
+                )
+            if not options['loop']:
+                if not sent and not failed:
+                    break
+                continue
+            if sent + failed < options['batch_size']:
+                sleep(options['interval'])
@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 11:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='tokens_revoked_at',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='Токены отозваны'),
+        ),
+    ]
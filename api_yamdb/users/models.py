@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 USER = 'user'
 MODERATOR = 'moderator'
@@ -11,6 +12,16 @@ ROLES = (
     (ADMIN, 'admin'),
 )
 
+PENDING = 'pending'
+SENT = 'sent'
+FAILED = 'failed'
+
+MAIL_STATUSES = (
+    (PENDING, 'ожидает отправки'),
+    (SENT, 'отправлено'),
+    (FAILED, 'не отправлено'),
+)
+
 
 class User(AbstractUser):
     username = models.CharField(
@@ -45,6 +56,23 @@ class User(AbstractUser):
         choices=ROLES,
         verbose_name='Роль пользователя',
     )
+    tokens_revoked_at = models.DateTimeField(
+        null=True,
+        editable=False,
+        verbose_name='Токены отозваны',
+    )
+    # Счётчики сдвигаются сигналами отзывов и комментариев,
+    # сверяются manage.py refresh_aggregates.
+    reviews_count = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество отзывов',
+    )
+    comments_count = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев',
+    )
 
     class Meta:
         verbose_name = 'Пользователь'
@@ -53,6 +81,11 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
 
+    def save(self, *args, **kwargs):
+        # Запись в журнале изменений - в той же транзакции.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     @property
     def is_admin(self):
         return self.role == ADMIN
@@ -64,3 +97,75 @@ class User(AbstractUser):
     @property
     def is_user(self):
         return self.role == USER
+
+
+class OutboxMail(models.Model):
+    """ Письмо в очереди на отправку. Пишется в транзакции
+    запроса, отправляется командой send_mail_outbox.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='outbox_mails',
+        verbose_name='Пользователь',
+    )
+    recipient = models.EmailField(
+        max_length=254,
+        verbose_name='Получатель',
+    )
+    subject = models.CharField(
+        max_length=254,
+        verbose_name='Тема',
+    )
+    body = models.TextField(
+        verbose_name='Текст письма',
+    )
+    status = models.CharField(
+        max_length=10,
+        default=PENDING,
+        choices=MAIL_STATUSES,
+        verbose_name='Статус',
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток отправки',
+    )
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Следующая попытка',
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка',
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создано',
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Отправлено',
+    )
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        constraints = (
+            # Повторный запрос кода не плодит писем: одно ждущее
+            # письмо на пользователя.
+            models.UniqueConstraint(
+                fields=('user',),
+                condition=models.Q(status=PENDING),
+                name='unique pending mail',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('status', 'next_attempt_at'),
+                name='outbox_status_next_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
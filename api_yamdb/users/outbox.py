@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import FAILED, PENDING, SENT, OutboxMail
+
+
+def enqueue_mail(user, subject, body):
+    """ Ставит письмо пользователю в очередь. Если письмо ещё
+    ждёт отправки, оно заменяется новым текстом.
+    """
+    defaults = {
+        'recipient': user.email,
+        'subject': subject,
+        'body': body,
+        'attempts': 0,
+        'next_attempt_at': timezone.now(),
+        'last_error': '',
+    }
+    try:
+        with transaction.atomic():
+            OutboxMail.objects.update_or_create(
+                user=user,
+                status=PENDING,
+                defaults=defaults,
+            )
+    except IntegrityError:
+        # Параллельный запрос уже создал ждущее письмо.
+        OutboxMail.objects.filter(user=user, status=PENDING).update(
+            **defaults
+        )
+
+
+def retry_delay(attempts):
+    """ Экспоненциальная пауза перед повторной отправкой. """
+    return min(
+        settings.MAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1),
+        settings.MAIL_OUTBOX_MAX_RETRY_DELAY,
+    )
+
+
+def claim_batch(batch_size):
+    """ Забирает пачку писем, которым пора уходить. На время
+    отправки письма откладываются на MAIL_OUTBOX_LEASE секунд,
+    чтобы их не взял параллельный воркер.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            OutboxMail.objects.select_for_update(skip_locked=True)
+            .filter(status=PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        OutboxMail.objects.filter(id__in=ids).update(
+            next_attempt_at=now + timedelta(
+                seconds=settings.MAIL_OUTBOX_LEASE
+            )
+        )
+    return list(OutboxMail.objects.filter(id__in=ids).order_by('id'))
+
+
+def send_batch(batch_size):
+    """ Отправляет пачку писем через одно соединение с почтовым
+    сервером. Возвращает количество отправленных и неудачных.
+    """
+    mails = claim_batch(batch_size)
+    if not mails:
+        return 0, 0
+    sent = failed = 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+        for mail in mails:
+            message = EmailMessage(
+                mail.subject,
+                mail.body,
+                settings.EMAIL_HOST_USER,
+                (mail.recipient,),
+                connection=connection,
+            )
+            try:
+                message.send()
+            except Exception as err:
+                failed += 1
+                mark_failed(mail, err)
+            else:
+                sent += 1
+                OutboxMail.objects.filter(pk=mail.pk).update(
+                    status=SENT,
+                    sent_at=timezone.now(),
+                    attempts=mail.attempts + 1,
+                )
+    except Exception as err:
+        # Не удалось даже соединиться - все письма пачки ждут повтора.
+        for mail in mails[sent + failed:]:
+            failed += 1
+            mark_failed(mail, err)
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def mark_failed(mail, err):
+    attempts = mail.attempts + 1
+    gave_up = attempts >= settings.MAIL_OUTBOX_MAX_ATTEMPTS
+    OutboxMail.objects.filter(pk=mail.pk).update(
+        status=FAILED if gave_up else PENDING,
+        attempts=attempts,
+        last_error=str(err),
+        next_attempt_at=timezone.now() + timedelta(
+            seconds=retry_delay(attempts)
+        ),
+    )
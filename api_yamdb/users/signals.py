@@ -0,0 +1,39 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import evict_auth_state
+from .models import User
+
+
+# Поля, зашитые в токены или проверяемые при аутентификации.
+AUTH_FIELDS = ('role', 'is_superuser', 'is_active')
+
+
+def auth_state(instance):
+    return tuple(instance.__dict__.get(field) for field in AUTH_FIELDS)
+
+
+@receiver(post_init, sender=User)
+def remember_auth_state(sender, instance, **kwargs):
+    instance._auth_state = auth_state(instance)
+
+
+@receiver(post_save, sender=User)
+def revoke_tokens_on_role_change(sender, instance, created, raw, **kwargs):
+    """ Роль и права зашиты в токены: при их изменении
+    все выданные раньше токены пользователя отзываются.
+    """
+    state = auth_state(instance)
+    if not (created or raw) and state != instance._auth_state:
+        instance.tokens_revoked_at = timezone.now()
+        User.objects.filter(pk=instance.pk).update(
+            tokens_revoked_at=instance.tokens_revoked_at
+        )
+    instance._auth_state = state
+    evict_auth_state(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def evict_deleted_user(sender, instance, **kwargs):
+    evict_auth_state(instance.pk)
@@ -0,0 +1,39 @@
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import ADMIN, MODERATOR, USER
+
+
+class RoleAccessToken(AccessToken):
+    """ Access-токен с именем, ролью и признаком суперюзера,
+    чтобы права проверялись без запроса пользователя из БД.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['username'] = user.username
+        token['role'] = user.role
+        token['is_superuser'] = user.is_superuser
+        return token
+
+
+class RoleTokenUser(TokenUser):
+    """ Пользователь, собранный из claims токена. """
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', USER)
+
+    @property
+    def is_admin(self):
+        return self.role == ADMIN
+
+    @property
+    def is_moderator(self):
+        return self.role == MODERATOR
+
+    @property
+    def is_user(self):
+        return self.role == USER
@@ -0,0 +1,75 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Кэш ответов и версий групп живёт в памяти процесса.
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def make_titles(db):
+    """ Произведения с категориями и двумя жанрами у каждого. """
+
+    def make(count):
+        categories = [
+            Category.objects.create(name=f'Категория {i}', slug=f'cat-{i}')
+            for i in range(3)
+        ]
+        genres = [
+            Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+            for i in range(4)
+        ]
+        titles = []
+        for i in range(count):
+            title = Title.objects.create(
+                name=f'Произведение {i:03}',
+                year=1950 + i % 70,
+                description=f'Описание {i}' if i % 2 else None,
+                category=categories[i % len(categories)],
+            )
+            title.genre.set((genres[i % 4], genres[(i + 1) % 4]))
+            titles.append(title)
+        return titles
+
+    return make
+
+
+@pytest.fixture
+def make_reviews(db):
+    """ Отзывы authors авторов на произведение и комментарии к ним. """
+
+    def make(title, authors, comments=3):
+        users = [
+            User.objects.get_or_create(
+                username=f'author{i}', email=f'author{i}@yamdb.fake'
+            )[0]
+            for i in range(authors)
+        ]
+        reviews = []
+        for i, user in enumerate(users):
+            review = Review.objects.create(
+                title=title, author=user, text=f'Отзыв {i}',
+                score=i % 10 + 1,
+            )
+            for j in range(comments):
+                Comment.objects.create(
+                    review=review, author=users[(i + j) % len(users)],
+                    text=f'Комментарий {j}',
+                )
+            reviews.append(review)
+        return reviews
+
+    return make
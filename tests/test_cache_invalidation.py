@@ -0,0 +1,32 @@
+from api.v1.cache import get_versions
+from reviews.lookups import category_slugs
+from reviews.models import Category, Review
+
+
+def test_versions_bumped_after_commit(make_titles, make_reviews,
+                                      django_capture_on_commit_callbacks):
+    """ Версии групп меняются только после COMMIT: запрос внутри
+    транзакции не закэширует старые строки под новой версией.
+    """
+    title = make_titles(1)[0]
+    review = make_reviews(title, authors=1, comments=0)[0]
+    groups = ('titles', f'reviews:{title.pk}', f'comments:{review.pk}')
+    before = get_versions(groups)
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        Review.objects.filter(pk=review.pk).get().delete()
+        assert get_versions(groups) == before
+    assert callbacks
+    assert all(
+        after > version
+        for after, version in zip(get_versions(groups), before)
+    )
+
+
+def test_slugs_evicted_after_commit(db, django_capture_on_commit_callbacks):
+    version = category_slugs.version
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        Category.objects.create(name='Книга', slug='book')
+        assert category_slugs.version == version
+    for callback in callbacks:
+        callback()
+    assert category_slugs.version > version
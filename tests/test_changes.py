@@ -0,0 +1,33 @@
+from rest_framework.renderers import JSONRenderer
+
+from reviews.models import Review
+from users.models import ADMIN, User
+
+
+def test_changes_rendered_without_fallback(make_titles, make_reviews,
+                                           api_client, monkeypatch, settings):
+    """ Журнал изменений рендерится orjson целиком, без повторного
+    рендеринга стандартным JSONRenderer.
+    """
+    settings.FAST_SERIALIZATION = True
+    title = make_titles(3)[0]
+    make_reviews(title, authors=2, comments=1)
+    Review.objects.filter(title=title).first().delete()
+    admin = User.objects.create(
+        username='admin1', email='admin1@yamdb.fake', role=ADMIN
+    )
+    api_client.force_authenticate(admin)
+
+    def fallback(*args, **kwargs):
+        raise AssertionError('JSONRenderer.render')
+
+    monkeypatch.setattr(JSONRenderer, 'render', fallback)
+    response = api_client.get('/api/v1/changes/?limit=100')
+    assert response.status_code == 200
+    results = response.json()['results']
+    assert {'category', 'genre', 'title', 'review', 'comment', 'user'} <= {
+        change['model'] for change in results
+    }
+    assert all(
+        isinstance(change['created_at'], str) for change in results
+    )
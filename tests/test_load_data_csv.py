@@ -0,0 +1,54 @@
+import pytest
+from django.core.management import call_command
+
+from reviews.management.commands.load_data_CSV import Command
+from reviews.models import Genre
+
+GENRES_COUNT = 25
+
+
+class Crash(Exception):
+    pass
+
+
+@pytest.mark.parametrize('crash_after', (1, 2))
+def test_resume_after_crash_before_checkpoint(db, tmp_path, monkeypatch,
+                                              crash_after):
+    """ Процесс упал после COMMIT пачки, но до записи контрольной
+    точки: при возобновлении пачка не загружается повторно.
+    """
+    with open(tmp_path / 'genre.csv', 'w', encoding='utf-8') as csv_file:
+        csv_file.write('id,name,slug\n')
+        for i in range(1, GENRES_COUNT + 1):
+            csv_file.write(f'{i},Жанр {i},genre-{i}\n')
+    options = {
+        'path': str(tmp_path),
+        'batch_size': 10,
+        'on_conflict': 'error',
+        'checkpoint': str(tmp_path / 'checkpoint.json'),
+        'rejects': str(tmp_path / 'rejects.csv'),
+    }
+    write_chunk = Command.write_chunk
+    save_checkpoint = Command.save_checkpoint
+    written = []
+
+    def counting_write_chunk(self, *args, **kwargs):
+        write_chunk(self, *args, **kwargs)
+        written.append(True)
+
+    def crashing_checkpoint(self, *args, **kwargs):
+        if len(written) == crash_after:
+            raise Crash
+        save_checkpoint(self, *args, **kwargs)
+
+    monkeypatch.setattr(Command, 'write_chunk', counting_write_chunk)
+    monkeypatch.setattr(Command, 'save_checkpoint', crashing_checkpoint)
+    with pytest.raises(Crash):
+        call_command('load_data_CSV', **options)
+    assert Genre.objects.count() == 10 * crash_after
+    monkeypatch.undo()
+
+    call_command('load_data_CSV', resume=True, **options)
+    assert sorted(Genre.objects.values_list('pk', flat=True)) == list(
+        range(1, GENRES_COUNT + 1)
+    )
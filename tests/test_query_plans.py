@@ -0,0 +1,67 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Таблицы списков: их нельзя читать целиком. Категории и жанры
+# читаются целиком один раз - в кэш слагов (reviews.lookups).
+LIST_TABLES = (
+    'reviews_title', 'reviews_genretitle', 'reviews_review',
+    'reviews_comment',
+)
+
+
+def query_plans(queries):
+    """ (SQL, строки EXPLAIN QUERY PLAN) выполненных запросов. """
+    with connection.cursor() as cursor:
+        for query in queries:
+            cursor.execute(f'EXPLAIN QUERY PLAN {query["sql"]}')
+            yield query['sql'], [row[-1] for row in cursor.fetchall()]
+
+
+def table_scans(plan):
+    return [
+        line for line in plan
+        if line.startswith('SCAN ') and ' USING ' not in line
+        and line.split()[1] in LIST_TABLES
+    ]
+
+
+@pytest.mark.parametrize('url, index', (
+    ('/api/v1/titles/', 'title_name_idx'),
+    ('/api/v1/titles/?year=1960', 'title_year_name_idx'),
+    ('/api/v1/titles/?category=cat-1', 'title_category_name_idx'),
+    ('/api/v1/titles/?genre=genre-2', 'genretitle_genre_title_idx'),
+    ('/api/v1/titles/{title}/reviews/', 'review_title_pub_date_idx'),
+    (
+        '/api/v1/titles/{title}/reviews/?pagination=cursor',
+        'review_title_pub_date_idx',
+    ),
+    (
+        '/api/v1/titles/{title}/reviews/{review}/comments/',
+        'comment_review_pub_date_idx',
+    ),
+    (
+        '/api/v1/titles/{title}/reviews/{review}/comments/'
+        '?pagination=cursor',
+        'comment_review_pub_date_idx',
+    ),
+))
+def test_list_uses_index(make_titles, make_reviews, api_client, url, index):
+    """ Списки читаются по индексам из 0006_access_path_indexes,
+    без полного просмотра таблиц.
+    """
+    if connection.vendor != 'sqlite':
+        pytest.skip('EXPLAIN QUERY PLAN есть только в SQLite')
+    title = make_titles(30)[0]
+    review = make_reviews(title, authors=3)[0]
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.get(
+            url.format(title=title.pk, review=review.pk)
+        )
+    assert response.status_code == 200
+    plans = list(query_plans(context.captured_queries))
+    for sql, plan in plans:
+        assert not table_scans(plan), f'{sql}\n' + '\n'.join(plan)
+    assert any(
+        index in line.split() for _, plan in plans for line in plan
+    ), '\n'.join(line for _, plan in plans for line in plan)
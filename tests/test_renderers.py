@@ -0,0 +1,33 @@
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+from api.v1.renderers import FastJSONRenderer
+
+
+@pytest.mark.parametrize('data', (
+    [1.5e-05, 1e-07, 0.0001, 0.00009999, 1e16, 1e15, 123.25, -0.0, 5e-324],
+    {'score': 0.000015, 'name': 'Ёжик', 'text': 'в 1e5 раз'},
+    {'rating': 7.5, 'reviews': [{'score': 10, 'text': 'a b'}]},
+    [0.1 * i for i in range(100)],
+))
+def test_fast_renderer_output(data):
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+@pytest.mark.parametrize('fast', (True, False))
+@pytest.mark.parametrize('url, fast_action', (
+    ('/api/v1/titles/', True),
+    ('/api/v1/titles/{title}/', False),
+    ('/api/v1/titles/{title}/similar/', False),
+    ('/api/v1/titles/{title}/stats/', False),
+    ('/api/v1/titles/{title}/reviews/', True),
+))
+def test_fast_renderer_only_for_list(make_titles, api_client, settings,
+                                     fast, url, fast_action):
+    settings.FAST_SERIALIZATION = fast
+    title = make_titles(2)[0]
+    response = api_client.get(url.format(title=title.pk))
+    assert response.status_code == 200
+    assert (
+        type(response.accepted_renderer) is FastJSONRenderer
+    ) == (fast and fast_action)
@@ -0,0 +1,24 @@
+import pytest
+
+
+@pytest.mark.parametrize('query, fields', (
+    ('', ['reviews_count', 'mean', 'median', 'scores']),
+    ('?fields=mean', ['mean']),
+    ('?fields=median,scores', ['median', 'scores']),
+    ('?exclude=scores', ['reviews_count', 'mean', 'median']),
+))
+def test_stats_sparse_fields(make_titles, make_reviews, api_client,
+                             query, fields):
+    title = make_titles(1)[0]
+    make_reviews(title, authors=4, comments=0)
+    response = api_client.get(f'/api/v1/titles/{title.pk}/stats/{query}')
+    assert response.status_code == 200
+    assert list(response.data) == fields
+    if 'mean' in fields:
+        assert response.data['mean'] == 2.5
+
+
+def test_stats_unknown_field(make_titles, api_client):
+    title = make_titles(1)[0]
+    response = api_client.get(f'/api/v1/titles/{title.pk}/stats/?fields=x')
+    assert response.status_code == 400
@@ -0,0 +1,55 @@
+import pytest
+from rest_framework.pagination import PageNumberPagination
+
+TITLES_COUNT = 120
+
+
+@pytest.mark.parametrize('fast', (True, False))
+@pytest.mark.parametrize('page_size', (5, 100))
+def test_title_list_queries(make_titles, api_client, django_assert_num_queries,
+                            monkeypatch, settings, fast, page_size):
+    """ Список произведений - COUNT, страница с категориями и жанры
+    одним запросом, сколько бы произведений ни было на странице.
+    """
+    make_titles(TITLES_COUNT)
+    settings.FAST_SERIALIZATION = fast
+    monkeypatch.setattr(PageNumberPagination, 'page_size', page_size)
+    with django_assert_num_queries(3):
+        response = api_client.get('/api/v1/titles/')
+    assert response.status_code == 200
+    assert response.data['count'] == TITLES_COUNT
+    results = response.data['results']
+    assert len(results) == page_size
+    assert all(title['category'] and title['genre'] for title in results)
+
+
+def test_title_detail_queries(make_titles, api_client,
+                              django_assert_num_queries):
+    title = make_titles(3)[1]
+    with django_assert_num_queries(2):
+        response = api_client.get(f'/api/v1/titles/{title.pk}/')
+    assert response.status_code == 200
+    assert len(response.data['genre']) == 2
+
+
+@pytest.mark.parametrize('fast', (True, False))
+def test_comment_list_queries(make_titles, make_reviews, api_client,
+                              django_assert_num_queries, settings, fast):
+    """ Комментарии - отзыв с произведением, COUNT и страница с авторами.
+    Без быстрого пути отзыв комментариям подставляется уже загруженный,
+    без JOIN.
+    """
+    title = make_titles(1)[0]
+    review = make_reviews(title, authors=5)[0]
+    settings.FAST_SERIALIZATION = fast
+    with django_assert_num_queries(3) as context:
+        response = api_client.get(
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+        )
+    assert response.status_code == 200
+    results = response.data['results']
+    assert len(results) == 3
+    assert all(comment['review'] == review.text for comment in results)
+    assert all(comment['author'] for comment in results)
+    if not fast:
+        assert 'reviews_review' not in context.captured_queries[-1]['sql']
@@ -0,0 +1,23 @@
+from users.cache import get_auth_state
+from users.models import ADMIN, USER, User
+
+
+def test_auth_state_evicted_after_commit(db,
+                                         django_capture_on_commit_callbacks):
+    """ Состояние, закэшированное параллельным запросом до COMMIT
+    смены роли, удаляется после COMMIT.
+    """
+    user = User.objects.create(
+        username='admin1', email='admin1@yamdb.fake', role=ADMIN
+    )
+    user = User.objects.get(pk=user.pk)
+    assert get_auth_state(user.pk)['revoked_at'] is None
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        user.role = USER
+        user.save()
+        # Запрос до COMMIT кэширует прежнее состояние.
+        assert get_auth_state(user.pk)['revoked_at'] is None
+    assert get_auth_state(user.pk)['revoked_at'] is None
+    for callback in callbacks:
+        callback()
+    assert get_auth_state(user.pk)['revoked_at'] is not None